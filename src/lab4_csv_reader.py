@@ -9,6 +9,9 @@ Learning Outcomes:
 """
 
 import csv
+import os
+import random
+from array import array
 
 
 def read_samples_as_list(filepath: str) -> list:
@@ -34,12 +37,19 @@ def read_samples_as_list(filepath: str) -> list:
     pass
 
 
-def read_samples_as_dict(filepath: str) -> list:
+def read_samples_as_dict(filepath: str, categorical=None,
+                         max_cardinality: int = 256) -> list:
     """
     Read CSV file and return data as list of dictionaries.
 
     Args:
         filepath: Path to the CSV file
+        categorical: Optional list of columns (or 'auto' for every column
+                     with at most max_cardinality distinct values) whose
+                     values are looked up in a per-column table, so all rows
+                     share one string object per distinct value instead of
+                     holding a fresh copy each
+        max_cardinality: Distinct values allowed for auto-detected columns
 
     Returns:
         List of dictionaries (each dict is a row with column names as keys)
@@ -48,12 +58,32 @@ def read_samples_as_dict(filepath: str) -> list:
         samples = read_samples_as_dict('data/samples.csv')
         # [{'sample_id': 'GEO-001', 'rock_type': 'Granite', 'grade': '2.5'}, ...]
         print(samples[0]['sample_id'])  # 'GEO-001'
+
+        samples = read_samples_as_dict('data/samples.csv',
+                                       categorical=['rock_type', 'location'])
     """
-    # TODO: Implement this function
-    # Use 'with' statement to open the file with newline=''
-    # Use csv.DictReader to read the CSV file
-    # Convert to list and return
-    pass
+    with open(filepath, newline='') as f:
+        reader = csv.DictReader(f)
+        if not categorical:
+            return list(reader)
+
+        fields = reader.fieldnames or []
+        auto = categorical == 'auto'
+        tables = {column: {} for column in fields if auto or column in categorical}
+        rows = []
+        for row in reader:
+            for column in list(tables):
+                table = tables[column]
+                value = row[column]
+                shared = table.get(value)
+                if shared is None:
+                    if auto and len(table) >= max_cardinality:
+                        del tables[column]  # too many distinct values
+                        continue
+                    shared = table[value] = value
+                row[column] = shared
+            rows.append(row)
+        return rows
 
 
 def get_column_values(filepath: str, column_name: str) -> list:
@@ -155,10 +185,454 @@ def get_csv_headers(filepath: str) -> list:
         headers = get_csv_headers('data/samples.csv')
         # ['sample_id', 'rock_type', 'grade', 'depth', 'mass', 'location']
     """
-    # TODO: Implement this function
-    # Read only the first row of the CSV
-    # Return as a list
-    pass
+    header, _ = read_header_with_offset(filepath)
+    return header
+
+
+def file_fingerprint(filepath: str) -> list:
+    """
+    Get a cheap fingerprint of a file's current contents.
+
+    Args:
+        filepath: Path to the file
+
+    Returns:
+        List of [size_in_bytes, modification_time_ns]; it changes whenever
+        the file is rewritten or appended to
+
+    Example:
+        before = file_fingerprint('data/samples.csv')
+        # [2143, 1760000000000000000]
+    """
+    info = os.stat(filepath)
+    return [info.st_size, info.st_mtime_ns]
+
+
+def _read_record(f) -> list:
+    """Read one CSV record from a binary file, or None at end of file."""
+    line = f.readline()
+    if not line:
+        return None
+    # A quoted field may contain newlines, so keep reading until quotes balance
+    while line.count(b'"') % 2:
+        more = f.readline()
+        if not more:
+            break
+        line += more
+    return next(csv.reader([line.decode('utf-8-sig')]), [])
+
+
+def read_header_with_offset(filepath: str) -> tuple:
+    """
+    Read the header row and find where the data rows start.
+
+    Args:
+        filepath: Path to the CSV file
+
+    Returns:
+        Tuple of (header: list, data_offset: int) where data_offset is the
+        byte offset of the first data row
+
+    Example:
+        header, offset = read_header_with_offset('data/samples.csv')
+        # (['sample_id', 'rock_type', ...], 46)
+    """
+    with open(filepath, 'rb') as f:
+        header = _read_record(f)
+        return (header or []), f.tell()
+
+
+def _decoded_lines(f, position: list):
+    """Decode the lines of a binary file, keeping position[0] at the end of the last one."""
+    for line in f:
+        # A byte order mark can only appear at the very start of the file
+        text = line.decode('utf-8-sig' if position[0] == 0 else 'utf-8')
+        position[0] += len(line)
+        yield text
+
+
+def iter_records(filepath: str, start: int = None, end: int = None):
+    """
+    Yield data rows together with the byte range each one occupies.
+
+    One csv.reader parses the whole range; it pulls lines one at a time
+    from a binary line iterator that counts bytes, so each record's end
+    offset is known without re-reading. Use iter_rows when the offsets
+    are not needed.
+
+    Args:
+        filepath: Path to the CSV file
+        start: Byte offset of the first record to read
+               (default: the first row after the header)
+        end: Stop at the first record starting at or after this offset
+             (default: read to the end of the file)
+
+    Yields:
+        Tuples of (start_offset, end_offset, values) where values is the
+        row as a list of strings. Blank lines are skipped.
+
+    Example:
+        for start, end, values in iter_records('data/samples.csv'):
+            print(start, values[0])  # 46 GEO-001
+    """
+    with open(filepath, 'rb') as f:
+        if start is not None:
+            f.seek(start)
+        position = [f.tell()]
+        reader = csv.reader(_decoded_lines(f, position))
+        if start is None:
+            next(reader, None)  # skip the header row
+        while end is None or position[0] < end:
+            offset = position[0]
+            values = next(reader, None)
+            if values is None:
+                break
+            if values:
+                yield offset, position[0], values
+
+
+def iter_rows(filepath: str, start: int = None, end: int = None):
+    """
+    Yield the data rows of a CSV file as lists of strings.
+
+    Reading the whole file streams it through a plain csv.reader; a byte
+    range (see iter_records) is read with iter_records.
+
+    Args:
+        filepath: Path to the CSV file
+        start: Byte offset of the first record to read (default: first row)
+        end: Stop at the first record starting at or after this offset
+
+    Yields:
+        Each non-blank data row as a list of strings
+
+    Example:
+        for values in iter_rows('data/samples.csv'):
+            print(values[0])  # GEO-001
+    """
+    if start is not None or end is not None:
+        for _, _, values in iter_records(filepath, start, end):
+            yield values
+        return
+    with open(filepath, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        next(reader, None)  # skip the header row
+        for values in reader:
+            if values:
+                yield values
+
+
+def split_record_chunks(filepath: str, chunk_bytes: int) -> list:
+    """
+    Split the data rows of a CSV file into byte ranges of about chunk_bytes.
+
+    Every range starts at the beginning of a record, so each one can be read
+    on its own with iter_records(filepath, start, end). After skipping
+    chunk_bytes, a boundary is placed at the next line end where the number
+    of quote characters since the start of the range is even, so a quoted
+    field containing newlines is never split. The file is read once in
+    blocks, counting quotes only. This assumes quotes appear only around
+    quoted fields (and doubled inside them), as in files written by the
+    csv module.
+
+    Args:
+        filepath: Path to the CSV file
+        chunk_bytes: Approximate size of each chunk in bytes
+
+    Returns:
+        List of (start, end) byte offsets covering all data rows in order
+
+    Example:
+        chunks = split_record_chunks('data/samples.csv', 1024)
+        # [(46, 1067), (1067, 2088), (2088, 2143)]
+    """
+    _, start = read_header_with_offset(filepath)
+    size = os.path.getsize(filepath)
+    chunks = []
+    with open(filepath, 'rb') as f:
+        f.seek(start)
+        while start < size:
+            block = f.read(max(1, chunk_bytes))
+            quotes = block.count(b'"')
+            at_line_end = block.endswith(b'\n')
+            # Finish the current line, then keep going while a quoted field
+            # is still open
+            while quotes % 2 or not at_line_end:
+                line = f.readline()
+                if not line:
+                    break
+                quotes += line.count(b'"')
+                at_line_end = True
+            end = min(size, f.tell())
+            chunks.append((start, end))
+            start = end
+    return chunks
+
+
+class ColumnStore:
+    """
+    Column-oriented copy of a CSV file.
+
+    Each column is stored once, and rows are identified by their position
+    (row id, 0-based). Rows are only turned into dictionaries when asked
+    for, so other structures can refer to rows with plain integers instead
+    of holding a dict per row.
+
+    Categorical columns are dictionary-encoded: the column holds small
+    integer codes in an array and dictionaries[column] maps each code back
+    to its value. With categorical='auto' every column starts encoded and
+    falls back to a plain list once it has more than max_cardinality
+    distinct values; a list of column names encodes exactly those columns.
+
+    Example:
+        store = read_columns('data/samples.csv')
+        store.row(0)                  # {'sample_id': 'GEO-001', ...}
+        store.value(0, 'grade')       # '0.6'
+        store.dictionaries['rock_type']   # ['Granite', 'Basalt', ...]
+        store.columns['rock_type'][:3]    # array('B', [0, 0, 0])
+    """
+
+    def __init__(self, header: list, categorical=None, max_cardinality: int = 256):
+        self.header = list(header)
+        self.max_cardinality = max_cardinality
+        self.columns = {}
+        self.dictionaries = {}
+        self._codes = {}
+        self._auto = categorical == 'auto'
+        if self._auto:
+            encoded = self.header
+        else:
+            encoded = [column for column in self.header if column in (categorical or ())]
+        for column in self.header:
+            if column in encoded:
+                # Auto-detected columns stay small enough for one byte per code
+                typecode = 'B' if self._auto and max_cardinality <= 256 else 'I'
+                self.columns[column] = array(typecode)
+                self.dictionaries[column] = []
+                self._codes[column] = {}
+            else:
+                self.columns[column] = []
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _decode_column(self, column: str) -> None:
+        """Turn an encoded column back into a plain list of values."""
+        values = self.dictionaries.pop(column)
+        self.columns[column] = [values[code] for code in self.columns[column]]
+        del self._codes[column]
+
+    def append(self, values: list) -> int:
+        """Add a row given as a list of values and return its row id."""
+        for i, column in enumerate(self.header):
+            value = values[i] if i < len(values) else None
+            codes = self._codes.get(column)
+            if codes is not None:
+                code = codes.get(value)
+                if code is None:
+                    if self._auto and len(codes) >= self.max_cardinality:
+                        self._decode_column(column)
+                        self.columns[column].append(value)
+                        continue
+                    code = codes[value] = len(codes)
+                    self.dictionaries[column].append(value)
+                self.columns[column].append(code)
+            else:
+                self.columns[column].append(value)
+        self._length += 1
+        return self._length - 1
+
+    def is_encoded(self, column: str) -> bool:
+        """True if the column holds dictionary codes."""
+        return column in self.dictionaries
+
+    def value(self, row_id: int, column: str):
+        """Get one value without building the whole row."""
+        value = self.columns[column][row_id]
+        if column in self.dictionaries:
+            return self.dictionaries[column][value]
+        return value
+
+    def row(self, row_id: int) -> dict:
+        """Materialize one row as a dictionary."""
+        return {column: self.value(row_id, column) for column in self.header}
+
+
+class RowIdView:
+    """
+    Lightweight list-like view of some rows of a ColumnStore.
+
+    Only the row ids are kept (4 bytes each in an array); indexing or
+    iterating materializes row dictionaries on demand.
+
+    Example:
+        view = RowIdView(store, [0, 4, 7])
+        len(view)                # 3
+        view[0]['sample_id']     # 'GEO-001'
+        view.column('grade')     # ['0.6', '2.86', '0.87']
+    """
+
+    def __init__(self, store: ColumnStore, row_ids=()):
+        self.store = store
+        self.row_ids = array('I', row_ids)
+
+    def __len__(self) -> int:
+        return len(self.row_ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return RowIdView(self.store, self.row_ids[index])
+        return self.store.row(self.row_ids[index])
+
+    def __iter__(self):
+        for row_id in self.row_ids:
+            yield self.store.row(row_id)
+
+    def column(self, column: str) -> list:
+        """Values of one column for the rows in this view."""
+        values = self.store.columns[column]
+        if self.store.is_encoded(column):
+            lookup = self.store.dictionaries[column]
+            return [lookup[values[row_id]] for row_id in self.row_ids]
+        return [values[row_id] for row_id in self.row_ids]
+
+
+def read_columns(filepath: str, columns: list = None, categorical='auto',
+                 max_cardinality: int = 256) -> ColumnStore:
+    """
+    Read a CSV file into a ColumnStore.
+
+    Args:
+        filepath: Path to the CSV file
+        columns: Columns to keep (default: all columns)
+        categorical: 'auto' to dictionary-encode every column with at most
+                     max_cardinality distinct values, a list of columns to
+                     always encode, or None to store plain values only
+        max_cardinality: Distinct values allowed for auto-detected columns
+
+    Returns:
+        ColumnStore holding the requested columns
+
+    Example:
+        store = read_columns('data/samples.csv', ['sample_id', 'location'])
+        len(store)  # 50
+        store = read_columns('data/samples.csv', categorical=['rock_type'])
+    """
+    header, _ = read_header_with_offset(filepath)
+    keep = [i for i, column in enumerate(header) if columns is None or column in columns]
+    store = ColumnStore([header[i] for i in keep], categorical, max_cardinality)
+    for values in iter_rows(filepath):
+        store.append([values[i] if i < len(values) else None for i in keep])
+    return store
+
+
+def reservoir_sample(filepath: str, k: int, seed: int = None,
+                     stratify_by: str = None):
+    """
+    Pick k random rows from a CSV file in a single streaming pass.
+
+    Uses reservoir sampling, so every row has the same chance of being
+    picked and only k rows (per group) are ever held in memory.
+
+    Args:
+        filepath: Path to the CSV file
+        k: Number of rows to sample (per group when stratified)
+        seed: Random seed; the same seed gives the same sample
+        stratify_by: Optional column; sample k rows for each of its values
+
+    Returns:
+        List of row dictionaries in file order, or when stratify_by is set,
+        a dictionary of group value -> list of row dictionaries
+
+    Example:
+        spot_checks = reservoir_sample('data/samples.csv', 5, seed=42)
+        per_site = reservoir_sample('data/samples.csv', 2, seed=42,
+                                    stratify_by='location')
+        # {'Site-A': [{...}, {...}], 'Site-B': [{...}, {...}]}
+    """
+    rng = random.Random(seed)
+    header, _ = read_header_with_offset(filepath)
+    group_index = header.index(stratify_by) if stratify_by is not None else None
+
+    reservoirs = {}  # group -> [rows seen, [(row_number, values), ...]]
+    for row_number, values in enumerate(iter_rows(filepath)):
+        group = None
+        if group_index is not None:
+            group = values[group_index] if group_index < len(values) else None
+        state = reservoirs.setdefault(group, [0, []])
+        seen, reservoir = state
+        if seen < k:
+            reservoir.append((row_number, values))
+        else:
+            # Replace a random slot with probability k / (seen + 1)
+            slot = rng.randrange(seen + 1)
+            if slot < k:
+                reservoir[slot] = (row_number, values)
+        state[0] = seen + 1
+
+    samples = {
+        group: [dict(zip(header, values)) for _, values in sorted(reservoir)]
+        for group, (_, reservoir) in reservoirs.items()
+    }
+    if stratify_by is None:
+        return samples.get(None, [])
+    return samples
+
+
+def seek_sample(filepath: str, k: int, seed: int = None,
+                max_attempts: int = None) -> list:
+    """
+    Pick about k random rows by jumping to random byte offsets.
+
+    Much faster than a full pass on huge files: each pick seeks to a random
+    offset and resyncs to the start of the next record. Rows that follow
+    long rows are a little more likely to be picked, so use
+    reservoir_sample when an exactly uniform sample matters. A resync that
+    lands inside a quoted field containing a newline reads a fragment that
+    fails to parse or has the wrong number of fields; such a pick counts as
+    a miss. Rows whose field count differs from the header are never picked.
+
+    Args:
+        filepath: Path to the CSV file
+        k: Number of distinct rows wanted
+        seed: Random seed; the same seed gives the same sample
+        max_attempts: Give up after this many seeks (default: 10 * k);
+                      small files may return fewer than k rows
+
+    Returns:
+        List of distinct row dictionaries in file order
+
+    Example:
+        spot_checks = seek_sample('data/samples.csv', 5, seed=42)
+    """
+    rng = random.Random(seed)
+    header, data_offset = read_header_with_offset(filepath)
+    size = os.path.getsize(filepath)
+    if max_attempts is None:
+        max_attempts = 10 * k
+
+    picked = {}
+    with open(filepath, 'rb') as f:
+        for _ in range(max_attempts):
+            if len(picked) >= k or size <= data_offset:
+                break
+            offset = rng.randrange(data_offset, size)
+            # Seek one byte back so an offset that is already a record start
+            # resyncs to that record rather than the one after it
+            f.seek(offset - 1)
+            f.readline()
+            if f.tell() >= size:
+                f.seek(data_offset)  # wrap around to the first record
+            start = f.tell()
+            try:
+                values = _read_record(f)
+            except csv.Error:
+                continue  # landed inside a multi-line field
+            if values and len(values) == len(header):
+                picked[start] = values
+
+    return [dict(zip(header, picked[start])) for start in sorted(picked)]
 
 
 # =============================================================================
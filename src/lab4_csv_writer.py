@@ -9,6 +9,13 @@ Learning Outcomes:
 """
 
 import csv
+import hashlib
+import heapq
+import math
+import os
+import tempfile
+
+from lab4_csv_reader import get_csv_headers, iter_rows, read_header_with_offset
 
 
 def write_samples_from_list(filepath: str, header: list, rows: list) -> int:
@@ -18,7 +25,8 @@ def write_samples_from_list(filepath: str, header: list, rows: list) -> int:
     Args:
         filepath: Path to the output CSV file
         header: List of column names
-        rows: List of lists (data rows)
+        rows: List of lists (data rows); any iterable works, so rows can
+              also be streamed from a generator
 
     Returns:
         Number of data rows written (excluding header)
@@ -32,13 +40,14 @@ def write_samples_from_list(filepath: str, header: list, rows: list) -> int:
         count = write_samples_from_list('output.csv', header, rows)
         # Returns 2
     """
-    # TODO: Implement this function
-    # Use 'with' statement to open file with newline=''
-    # Create csv.writer object
-    # Write header row using writerow()
-    # Write data rows using writerows() or writerow() in a loop
-    # Return count of data rows written
-    pass
+    count = 0
+    with open(filepath, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
 
 
 def write_samples_from_dict(filepath: str, fieldnames: list, rows: list) -> int:
@@ -113,22 +122,29 @@ def append_row_to_csv(filepath: str, row: dict) -> bool:
         new_sample = {'sample_id': 'GEO-051', 'rock_type': 'Granite', 'grade': '3.1'}
         success = append_row_to_csv('data/samples.csv', new_sample)
     """
-    # TODO: Implement this function
-    # First, read the existing headers from the file
-    # Open file in append mode ('a') with newline=''
-    # Create DictWriter with existing headers
-    # Write the new row
-    # Return True if successful
-    pass
-
-
-def merge_csv_files(file_paths: list, output_path: str) -> int:
+    try:
+        # Use the existing header so the new row lines up with the old ones
+        headers = get_csv_headers(filepath)
+        with open(filepath, 'a', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=headers)
+            writer.writerow(row)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def merge_csv_files(file_paths: list, output_path: str,
+                    drop_duplicates: bool = False,
+                    key_column: str = 'sample_id') -> int:
     """
     Merge multiple CSV files with the same structure into one.
 
     Args:
         file_paths: List of paths to CSV files to merge
         output_path: Path to the output merged CSV file
+        drop_duplicates: If True, keep only the first row for each key that
+                         appears more than once (see find_duplicate_ids)
+        key_column: Column identifying a sample when dropping duplicates
 
     Returns:
         Total number of data rows in merged file
@@ -136,13 +152,118 @@ def merge_csv_files(file_paths: list, output_path: str) -> int:
     Example:
         files = ['data1.csv', 'data2.csv', 'data3.csv']
         total = merge_csv_files(files, 'merged.csv')
+        total = merge_csv_files(files, 'merged.csv', drop_duplicates=True)
+    """
+    header = get_csv_headers(file_paths[0]) if file_paths else []
+    duplicates = find_duplicate_ids(file_paths, key_column) if drop_duplicates else {}
+    key_index = header.index(key_column) if duplicates else None
+
+    def merged_rows():
+        written = set()  # only ever holds duplicated keys
+        for path in file_paths:
+            for values in iter_rows(path):
+                if duplicates:
+                    key = values[key_index] if key_index < len(values) else None
+                    if key in duplicates:
+                        if key in written:
+                            continue
+                        written.add(key)
+                yield values
+
+    return write_samples_from_list(output_path, header, merged_rows())
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set of strings.
+
+    Membership tests never give false negatives; false positives happen with
+    roughly the requested probability once expected_items keys are added.
+    Memory is about 1.2 bytes per expected key at a 1% false positive rate.
+
+    Example:
+        seen = BloomFilter(expected_items=1000)
+        seen.add('GEO-001')        # False: definitely not seen before
+        seen.add('GEO-001')        # True: probably seen before
+        'GEO-002' in seen          # False
     """
-    # TODO: Implement this function
-    # Read headers from first file
-    # Open output file and write headers
-    # Read each input file and write its data rows
-    # Return total count of data rows
-    pass
+
+    def __init__(self, expected_items: int, false_positive_rate: float = 0.01):
+        expected_items = max(1, expected_items)
+        self.size = max(8, math.ceil(-expected_items * math.log(false_positive_rate)
+                                     / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / expected_items * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(key))
+
+    def add(self, key: str) -> bool:
+        """Add a key; return True if it was probably already present."""
+        present = True
+        for p in self._positions(key):
+            if not self.bits[p >> 3] & (1 << (p & 7)):
+                present = False
+                self.bits[p >> 3] |= 1 << (p & 7)
+        return present
+
+
+def find_duplicate_ids(file_paths: list, key_column: str = 'sample_id',
+                       expected_items: int = None,
+                       false_positive_rate: float = 0.01) -> dict:
+    """
+    Find keys that occur more than once across one or more CSV files.
+
+    The first pass adds every key to a Bloom filter and remembers only the
+    keys the filter has probably seen before. The second pass counts those
+    candidates exactly, so false positives are dropped and memory stays
+    proportional to the number of candidates, not the number of rows.
+
+    Args:
+        file_paths: List of paths to CSV files
+        key_column: Column holding the key (default: 'sample_id')
+        expected_items: Expected number of rows (default: estimated from
+                        the file sizes)
+        false_positive_rate: Target false positive rate of the Bloom filter
+
+    Returns:
+        Dictionary of duplicated key -> number of occurrences
+
+    Example:
+        duplicates = find_duplicate_ids(['export1.csv', 'export2.csv'])
+        # {'GEO-017': 2}
+    """
+    if expected_items is None:
+        # Rows are at least ~16 bytes, so this over- rather than under-estimates
+        expected_items = sum(os.path.getsize(path) for path in file_paths) // 16
+    seen = BloomFilter(expected_items, false_positive_rate)
+
+    def keys(path):
+        header, _ = read_header_with_offset(path)
+        index = header.index(key_column)
+        for values in iter_rows(path):
+            if index < len(values):
+                yield values[index]
+
+    candidates = set()
+    for path in file_paths:
+        for key in keys(path):
+            if seen.add(key):
+                candidates.add(key)
+
+    counts = dict.fromkeys(candidates, 0)
+    for path in file_paths:
+        for key in keys(path):
+            if key in counts:
+                counts[key] += 1
+    return {key: count for key, count in counts.items() if count > 1}
 
 
 def create_sample_csv(filepath: str, num_samples: int) -> int:
@@ -168,6 +289,68 @@ def create_sample_csv(filepath: str, num_samples: int) -> int:
     pass
 
 
+def sort_csv_by_column(input_path: str, output_path: str, column: str,
+                       chunk_rows: int = 100000) -> int:
+    """
+    Sort a CSV file by one column using bounded memory.
+
+    At most chunk_rows rows are held in memory: each chunk is sorted and
+    written to a temporary run file, then the runs are merged. Values are
+    compared as strings and the sort is stable.
+
+    Args:
+        input_path: Path to the input CSV file
+        output_path: Path to the sorted output CSV file
+        column: Name of the column to sort by
+        chunk_rows: Maximum number of rows sorted in memory at once
+
+    Returns:
+        Number of data rows written
+
+    Example:
+        count = sort_csv_by_column('data/samples.csv', 'by_location.csv', 'location')
+    """
+    header, _ = read_header_with_offset(input_path)
+    index = header.index(column)
+
+    def sort_key(row):
+        return row[index] if index < len(row) else ''
+
+    run_paths = []
+    chunk = []
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    try:
+        for values in iter_rows(input_path):
+            chunk.append(values)
+            if len(chunk) >= chunk_rows:
+                chunk.sort(key=sort_key)
+                fd, run_path = tempfile.mkstemp(suffix='.csv', dir=output_dir)
+                os.close(fd)
+                run_paths.append(run_path)
+                write_samples_from_list(run_path, header, chunk)
+                chunk = []
+        chunk.sort(key=sort_key)
+        if not run_paths:
+            return write_samples_from_list(output_path, header, chunk)
+
+        # Merge the sorted runs (and the last in-memory chunk) into the output
+        files = [open(run_path, newline='') for run_path in run_paths]
+        try:
+            readers = []
+            for f in files:
+                reader = csv.reader(f)
+                next(reader)  # skip the header of each run
+                readers.append(reader)
+            merged = heapq.merge(*readers, chunk, key=sort_key)
+            return write_samples_from_list(output_path, header, merged)
+        finally:
+            for f in files:
+                f.close()
+    finally:
+        for run_path in run_paths:
+            os.remove(run_path)
+
+
 # =============================================================================
 # Test your code by running this file directly
 # =============================================================================
@@ -9,53 +9,342 @@ Learning Outcomes:
 - LO4.4: Use context managers (with statement) for file operations
 """
 
+import bisect
+import copy
 import csv
+import glob
+import hashlib
+import heapq
+import itertools
+import json
+import math
+import operator
+import os
+import pickle
+import random
+import tempfile
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 
+try:
+    import numpy as np  # optional: vectorizes calculate_binned_statistics
+except ImportError:
+    np = None
 
-def calculate_statistics(filepath: str, column: str) -> dict:
+from lab4_csv_reader import (
+    RowIdView, file_fingerprint, iter_records, iter_rows, read_columns,
+    read_header_with_offset,
+)
+from lab4_csv_writer import sort_csv_by_column, write_samples_from_list
+from lab4_error_handling import (
+    CHECKPOINT_EVERY_ROWS, convert_column, iter_checkpointed_records, safe_convert_numeric
+)
+
+# Zone maps are stored next to the CSV file in a small JSON sidecar
+ZONE_MAP_SUFFIX = '.zonemap.json'
+ZONE_MAP_BLOCK_ROWS = 1024
+
+# Incrementally maintained aggregates live in a second sidecar, and the
+# sample_ids per location in an append-only JSON-lines sidecar
+AGGREGATE_STORE_SUFFIX = '.aggregates.json'
+LOCATION_IDS_SUFFIX = '.locations.jsonl'
+# Size of each sampled block (start, middle and end of the processed rows)
+# that must be unchanged for a resume
+AGGREGATE_CHECK_BYTES = 4096
+
+# Numeric columns are converted this many values at a time
+CONVERT_BATCH_ROWS = 8192
+
+# Joins build an in-memory hash table when one side is at most this big
+HASH_JOIN_MAX_BYTES = 64 * 1024 * 1024
+
+# Files up to this size get exact quantiles; larger files use a sketch
+EXACT_QUANTILE_MAX_BYTES = 10 * 1024 * 1024
+
+
+def _field(values: list, index: int):
+    """Return values[index], or None if a short row has no such field."""
+    return values[index] if index < len(values) else None
+
+
+def _column_batches(filepath: str, columns: list):
+    """Yield lists of raw values for the given columns, CONVERT_BATCH_ROWS rows at a time."""
+    header, _ = read_header_with_offset(filepath)
+    indices = [header.index(column) for column in columns]
+    batch = [[] for _ in indices]
+    for values in iter_rows(filepath):
+        for raw, index in zip(batch, indices):
+            raw.append(_field(values, index))
+        if len(batch[0]) >= CONVERT_BATCH_ROWS:
+            yield batch
+            batch = [[] for _ in indices]
+    if batch[0]:
+        yield batch
+
+
+def _numeric_values(filepath: str, column: str):
+    """Yield the numeric values of a column, converted in batches with convert_column."""
+    for raw, in _column_batches(filepath, [column]):
+        numbers, ok, _ = convert_column(raw)
+        yield from itertools.compress(numbers, ok)
+
+
+def _new_stats_state() -> dict:
+    """Create an empty partial state for calculate_statistics."""
+    return {'count': 0, 'sum': 0.0, 'min': None, 'max': None}
+
+
+def _update_stats_state(state: dict, value: float) -> None:
+    """Add one numeric value to a statistics partial state."""
+    state['count'] += 1
+    state['sum'] += value
+    if state['min'] is None or value < state['min']:
+        state['min'] = value
+    if state['max'] is None or value > state['max']:
+        state['max'] = value
+
+
+def _merge_stats_states(state: dict, other: dict) -> None:
+    """Merge the statistics partial state other into state."""
+    if other['count'] == 0:
+        return
+    state['count'] += other['count']
+    state['sum'] += other['sum']
+    if state['min'] is None or other['min'] < state['min']:
+        state['min'] = other['min']
+    if state['max'] is None or other['max'] > state['max']:
+        state['max'] = other['max']
+
+
+def _finalize_stats(state: dict) -> dict:
+    """Turn a statistics partial state into the calculate_statistics result."""
+    if state['count'] == 0:
+        return {'count': 0, 'sum': 0.0, 'mean': 0.0, 'min': None, 'max': None}
+    return {
+        'count': state['count'],
+        'sum': round(state['sum'], 2),
+        'mean': round(state['sum'] / state['count'], 2),
+        'min': round(state['min'], 2),
+        'max': round(state['max'], 2),
+    }
+
+
+class QuantileSketch:
+    """
+    Streaming quantile sketch (KLL) with bounded memory.
+
+    Values are kept in a stack of compactors; when one fills up, half of its
+    sorted values are promoted to the next level with double weight. The
+    rank error of a quantile estimate is roughly `error` (as a fraction of
+    the number of values), and memory grows only with 1 / error.
+    Sketches built over different files can be merged.
+
+    Example:
+        sketch = QuantileSketch(error=0.01)
+        for value in [2.5, 1.8, 3.2]:
+            sketch.add(value)
+        sketch.quantile(0.5)  # 2.5
+    """
+
+    def __init__(self, error: float = 0.01, seed: int = None):
+        self.error = error
+        self.k = max(8, math.ceil(2.0 / error))
+        self.count = 0
+        self.compactors = [[]]
+        self._rng = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _capacity(self, level: int) -> int:
+        # Lower levels get smaller buffers; the top level holds k values
+        depth = len(self.compactors) - level - 1
+        return max(2, math.ceil(self.k * (2 / 3) ** depth))
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.compactors):
+            if len(self.compactors[level]) >= self._capacity(level):
+                if level + 1 == len(self.compactors):
+                    self.compactors.append([])
+                values = sorted(self.compactors[level])
+                # Keep one value back if the count is odd, promote every
+                # other value starting at a random offset
+                kept = [values.pop()] if len(values) % 2 else []
+                offset = self._rng.randint(0, 1)
+                self.compactors[level + 1].extend(values[offset::2])
+                self.compactors[level] = kept
+            level += 1
+
+    def add(self, value: float) -> None:
+        """Add one value to the sketch."""
+        self.compactors[0].append(value)
+        self.count += 1
+        if len(self.compactors[0]) >= self._capacity(0):
+            self._compress()
+
+    def merge(self, other: 'QuantileSketch') -> None:
+        """Merge another sketch into this one."""
+        while len(self.compactors) < len(other.compactors):
+            self.compactors.append([])
+        for level, values in enumerate(other.compactors):
+            self.compactors[level].extend(values)
+        self.count += other.count
+        self._compress()
+
+    def quantile(self, q: float):
+        """Estimate the q-quantile (0 <= q <= 1), or None if empty."""
+        weighted = sorted(
+            (value, 2 ** level)
+            for level, values in enumerate(self.compactors)
+            for value in values
+        )
+        if not weighted:
+            return None
+        total = sum(weight for _, weight in weighted)
+        target = q * total
+        seen = 0
+        for value, weight in weighted:
+            seen += weight
+            if seen >= target:
+                return value
+        return weighted[-1][0]
+
+
+def _quantile_key(q: float) -> str:
+    """Name a quantile the way it appears in results, e.g. 0.9 -> 'p90'."""
+    return f"p{q * 100:g}"
+
+
+def _exact_quantile(sorted_values: list, q: float):
+    """Nearest-rank quantile of an already sorted list, or None if empty."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def calculate_statistics(filepath: str, column: str,
+                         incremental: bool = False, quantiles: list = None,
+                         error: float = 0.01,
+                         exact_threshold: int = EXACT_QUANTILE_MAX_BYTES,
+                         checkpoint: str = None,
+                         checkpoint_every: int = CHECKPOINT_EVERY_ROWS) -> dict:
     """
     Calculate basic statistics for a numeric column.
 
     Args:
         filepath: Path to the CSV file
         column: Name of the numeric column
+        incremental: If True, use the aggregate store so only rows appended
+                     since the last call are read (see update_aggregate_store)
+        quantiles: Optional list of quantiles to add, e.g. [0.5, 0.9, 0.99]
+        error: Rank error allowed for approximate quantiles
+        exact_threshold: Files up to this many bytes get exact quantiles;
+                         larger files use a QuantileSketch (one pass,
+                         bounded memory)
+        checkpoint: If given, save the byte offset, row number and partial
+                    statistics to this file every checkpoint_every rows, and
+                    resume from it when the input file is unchanged
+        checkpoint_every: Rows between checkpoints
 
     Returns:
         Dictionary with 'count', 'sum', 'mean', 'min', 'max'
         Values should be rounded to 2 decimal places where applicable
+        Each requested quantile is added as 'p50', 'p90', 'p99', ...
 
     Example:
         stats = calculate_statistics('data/samples.csv', 'grade')
         # {'count': 50, 'sum': 125.5, 'mean': 2.51, 'min': 0.5, 'max': 4.8}
+
+        stats = calculate_statistics('data/samples.csv', 'grade',
+                                     quantiles=[0.5, 0.9])
+        # {..., 'p50': 2.53, 'p90': 3.92}
     """
-    # TODO: Implement this function
-    # Read the CSV file using DictReader
-    # Extract numeric values from the specified column
-    # Skip rows where the value cannot be converted to float
-    # Calculate count, sum, mean, min, max
-    # Return dictionary with statistics (round to 2 decimal places)
-    pass
+    if incremental:
+        if quantiles:
+            raise ValueError("quantiles cannot be combined with incremental=True")
+        store = update_aggregate_store(filepath)
+        return _finalize_stats(store['stats'].get(column, _new_stats_state()))
+
+    if checkpoint is not None:
+        if quantiles:
+            raise ValueError("quantiles cannot be combined with checkpoint")
+        header, _ = read_header_with_offset(filepath)
+        index = header.index(column)
+        state = _new_stats_state()
+        for _, values in iter_checkpointed_records(filepath, checkpoint,
+                                                   ['statistics', column],
+                                                   state, checkpoint_every):
+            value = safe_convert_numeric(_field(values, index))
+            if value is not None:
+                _update_stats_state(state, value)
+        return _finalize_stats(state)
+
+    state = _new_stats_state()
+    exact = quantiles and os.path.getsize(filepath) <= exact_threshold
+    collected = [] if exact else None
+    sketch = QuantileSketch(error) if quantiles and not exact else None
+    # Rows where the value cannot be converted to float are skipped
+    for value in _numeric_values(filepath, column):
+        _update_stats_state(state, value)
+        if exact:
+            collected.append(value)
+        elif sketch is not None:
+            sketch.add(value)
 
+    stats = _finalize_stats(state)
+    if exact:
+        collected.sort()
+    for q in quantiles or []:
+        value = _exact_quantile(collected, q) if exact else sketch.quantile(q)
+        stats[_quantile_key(q)] = None if value is None else round(value, 2)
+    return stats
 
-def group_by_location(filepath: str) -> dict:
+
+def group_by_location(filepath: str, incremental: bool = False,
+                      as_views: bool = False) -> dict:
     """
     Group samples by their location.
 
     Args:
         filepath: Path to the CSV file
+        incremental: If True, use the aggregate store so only rows appended
+                     since the last call are read (see update_aggregate_store)
+        as_views: If True, return a RowIdView per location instead of a list
+                  of sample_ids. All views share one ColumnStore and hold only
+                  row ids; full rows are built when a view is indexed.
 
     Returns:
         Dictionary with location as key and list of sample_ids as value
+        (or a RowIdView of full rows when as_views is True)
 
     Example:
         groups = group_by_location('data/samples.csv')
         # {'Site-A': ['GEO-001', 'GEO-005', ...], 'Site-B': ['GEO-002', ...]}
+
+        views = group_by_location('data/samples.csv', as_views=True)
+        views['Site-A'][0]               # {'sample_id': 'GEO-001', ...}
+        views['Site-A'].column('grade')  # ['0.6', '0.62', ...]
     """
-    # TODO: Implement this function
-    # Read CSV using DictReader
-    # Create a dictionary to group sample_ids by location
-    # Return the dictionary
-    pass
+    if as_views:
+        store = read_columns(filepath)
+        # Group on the dictionary codes when location is encoded (it usually is)
+        labels = store.dictionaries.get('location')
+        row_ids = {}
+        for row_id, key in enumerate(store.columns['location']):
+            row_ids.setdefault(key, []).append(row_id)
+        return {(labels[key] if labels is not None else key): RowIdView(store, ids)
+                for key, ids in row_ids.items()}
+
+    if incremental:
+        return _read_location_ids(filepath)
+
+    groups = {}
+    with open(filepath, newline='') as f:
+        for row in csv.DictReader(f):
+            groups.setdefault(row['location'], []).append(row['sample_id'])
+    return groups
 
 
 def find_high_grade_samples(filepath: str, threshold: float) -> list:
@@ -73,20 +362,36 @@ def find_high_grade_samples(filepath: str, threshold: float) -> list:
         high_grade = find_high_grade_samples('data/samples.csv', 3.0)
         # [{'sample_id': 'GEO-023', 'grade': '4.5', ...}, ...]
     """
-    # TODO: Implement this function
-    # Read CSV using DictReader
-    # Filter samples where float(grade) > threshold
-    # Sort by grade in descending order
-    # Return list of sample dictionaries
-    pass
+    header, _ = read_header_with_offset(filepath)
+    grade_index = header.index('grade')
+
+    high_grade = []
+    # Only blocks whose maximum grade is above the threshold can match
+    for start, end in _candidate_ranges(filepath, 'grade', threshold, None,
+                                        include_low=False):
+        for values in iter_rows(filepath, start, end):
+            grade = safe_convert_numeric(_field(values, grade_index))
+            if grade is not None and grade > threshold:
+                high_grade.append((grade, dict(zip(header, values))))
 
+    high_grade.sort(key=lambda item: item[0], reverse=True)
+    return [row for _, row in high_grade]
 
-def count_by_rock_type(filepath: str) -> dict:
+
+def count_by_rock_type(filepath: str, incremental: bool = False,
+                       checkpoint: str = None,
+                       checkpoint_every: int = CHECKPOINT_EVERY_ROWS) -> dict:
     """
     Count the number of samples for each rock type.
 
     Args:
         filepath: Path to the CSV file
+        incremental: If True, use the aggregate store so only rows appended
+                     since the last call are read (see update_aggregate_store)
+        checkpoint: If given, save progress and the partial counts to this
+                    file every checkpoint_every rows, and resume from it when
+                    the input file is unchanged
+        checkpoint_every: Rows between checkpoints
 
     Returns:
         Dictionary with rock_type as key and count as value
@@ -95,13 +400,25 @@ def count_by_rock_type(filepath: str) -> dict:
         counts = count_by_rock_type('data/samples.csv')
         # {'Granite': 12, 'Basalt': 8, 'Sandstone': 15, ...}
     """
-    # TODO: Implement this function
-    # Read CSV and count occurrences of each rock type
-    pass
+    if incremental:
+        return dict(update_aggregate_store(filepath)['rock_types'])
+
+    if checkpoint is not None:
+        header, _ = read_header_with_offset(filepath)
+        index = header.index('rock_type')
+        counts = {}
+        for _, values in iter_checkpointed_records(filepath, checkpoint, ['rock_types'],
+                                                   counts, checkpoint_every):
+            rock_type = _field(values, index)
+            counts[rock_type] = counts.get(rock_type, 0) + 1
+        return counts
+
+    return _partial_rock_type_counts(filepath)
 
 
 def calculate_average_by_group(filepath: str, group_column: str,
-                                value_column: str) -> dict:
+                                value_column: str, checkpoint: str = None,
+                                checkpoint_every: int = CHECKPOINT_EVERY_ROWS) -> dict:
     """
     Calculate average of a numeric column grouped by another column.
 
@@ -109,6 +426,10 @@ def calculate_average_by_group(filepath: str, group_column: str,
         filepath: Path to the CSV file
         group_column: Column to group by (e.g., 'location', 'rock_type')
         value_column: Numeric column to average (e.g., 'grade', 'depth')
+        checkpoint: If given, save progress and the per-group sums to this
+                    file every checkpoint_every rows, and resume from it when
+                    the input file is unchanged
+        checkpoint_every: Rows between checkpoints
 
     Returns:
         Dictionary with group values as keys and average as values
@@ -119,11 +440,23 @@ def calculate_average_by_group(filepath: str, group_column: str,
         )
         # {'Site-A': 2.45, 'Site-B': 3.12, 'Site-C': 1.89}
     """
-    # TODO: Implement this function
-    # Read CSV and group numeric values by the group column
-    # Calculate average for each group
-    # Return dictionary with averages (rounded to 2 decimal places)
-    pass
+    if checkpoint is not None:
+        header, _ = read_header_with_offset(filepath)
+        group_index, value_index = header.index(group_column), header.index(value_column)
+        sums = {}
+        for _, values in iter_checkpointed_records(
+                filepath, checkpoint, ['average_by_group', group_column, value_column],
+                sums, checkpoint_every):
+            value = safe_convert_numeric(_field(values, value_index))
+            if value is not None:
+                group_sums = sums.setdefault(_field(values, group_index), [0.0, 0])
+                group_sums[0] += value
+                group_sums[1] += 1
+        return _finalize_group_sums(sums)
+
+    return _finalize_group_sums(
+        _partial_group_sums(filepath, group_column, value_column)
+    )
 
 
 def generate_summary_report(filepath: str, output_path: str) -> None:
@@ -183,9 +516,1265 @@ def find_depth_range_samples(filepath: str, min_depth: int, max_depth: int) -> l
     Example:
         samples = find_depth_range_samples('data/samples.csv', 100, 200)
     """
-    # TODO: Implement this function
-    # Read CSV and filter by depth range
-    pass
+    header, _ = read_header_with_offset(filepath)
+    depth_index = header.index('depth')
+
+    samples = []
+    for start, end in _candidate_ranges(filepath, 'depth', min_depth, max_depth):
+        for values in iter_rows(filepath, start, end):
+            depth = safe_convert_numeric(_field(values, depth_index))
+            if depth is not None and min_depth <= depth <= max_depth:
+                samples.append(dict(zip(header, values)))
+    return samples
+
+
+# =============================================================================
+# Zone maps: per-block min/max summaries used to skip blocks in range queries
+# =============================================================================
+
+def build_zone_map(filepath: str, columns: list = None,
+                   block_rows: int = ZONE_MAP_BLOCK_ROWS) -> dict:
+    """
+    Build a zone map for a CSV file and save it as a sidecar file.
+
+    The data rows are split into blocks of block_rows rows. For each block
+    the byte range and the min/max of every numeric column are recorded, so
+    range queries can skip blocks that cannot contain a match. Zone maps
+    work best when the file is ordered by the queried column (e.g. depth).
+
+    Args:
+        filepath: Path to the CSV file
+        columns: Numeric columns to summarise (default: ['grade', 'depth'])
+        block_rows: Number of data rows per block
+
+    Returns:
+        The zone map dictionary that was written to filepath + '.zonemap.json'
+
+    Example:
+        zone_map = build_zone_map('data/samples.csv', ['depth'], block_rows=10)
+        # {'fingerprint': [...], 'columns': ['depth'], 'blocks': [
+        #     {'start': 46, 'end': 402, 'rows': 10,
+        #      'min': {'depth': 73.0}, 'max': {'depth': 464.0}}, ...]}
+    """
+    if columns is None:
+        columns = ['grade', 'depth']
+    header, _ = read_header_with_offset(filepath)
+    indices = {column: header.index(column) for column in columns
+               if column in header}
+
+    blocks = []
+    block = None
+    for start, end, values in iter_records(filepath):
+        if block is None:
+            block = {'start': start, 'end': end, 'rows': 0, 'min': {}, 'max': {}}
+        block['end'] = end
+        block['rows'] += 1
+        for column, index in indices.items():
+            value = safe_convert_numeric(_field(values, index))
+            if value is None:
+                continue
+            if column not in block['min'] or value < block['min'][column]:
+                block['min'][column] = value
+            if column not in block['max'] or value > block['max'][column]:
+                block['max'][column] = value
+        if block['rows'] >= block_rows:
+            blocks.append(block)
+            block = None
+    if block is not None:
+        blocks.append(block)
+
+    zone_map = {
+        'fingerprint': file_fingerprint(filepath),
+        'columns': list(indices),
+        'blocks': blocks,
+    }
+    with open(filepath + ZONE_MAP_SUFFIX, 'w') as f:
+        json.dump(zone_map, f)
+    return zone_map
+
+
+def load_zone_map(filepath: str) -> dict:
+    """
+    Load the zone map sidecar for a CSV file if it is still up to date.
+
+    Args:
+        filepath: Path to the CSV file
+
+    Returns:
+        The zone map dictionary, or None if there is no sidecar or the CSV
+        file has changed since the zone map was built
+    """
+    try:
+        with open(filepath + ZONE_MAP_SUFFIX) as f:
+            zone_map = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if zone_map.get('fingerprint') != file_fingerprint(filepath):
+        return None
+    return zone_map
+
+
+def _candidate_ranges(filepath: str, column: str, low, high,
+                      include_low: bool = True) -> list:
+    """
+    Get the byte ranges that may hold rows with low <= column <= high.
+
+    low or high may be None for an open-ended range; include_low=False makes
+    the lower bound exclusive. Without a usable zone map the whole file is a
+    single range [(None, None)]. Adjacent matching blocks are merged.
+    """
+    zone_map = load_zone_map(filepath)
+    if zone_map is None or column not in zone_map['columns']:
+        return [(None, None)]
+
+    ranges = []
+    for block in zone_map['blocks']:
+        if column not in block['min']:
+            continue  # no numeric values in this block, so nothing can match
+        block_min = block['min'][column]
+        block_max = block['max'][column]
+        if high is not None and block_min > high:
+            continue
+        if low is not None and (block_max < low or
+                                (not include_low and block_max <= low)):
+            continue
+        if ranges and ranges[-1][1] == block['start']:
+            ranges[-1] = (ranges[-1][0], block['end'])
+        else:
+            ranges.append((block['start'], block['end']))
+    return ranges
+
+
+# =============================================================================
+# Incrementally maintained aggregates for append-heavy files
+# =============================================================================
+
+def _prefix_checksum(filepath: str, offset: int) -> str:
+    """Hash sampled blocks of the first offset bytes to detect a rewritten file."""
+    digest = hashlib.sha256()
+    middle = max(0, offset // 2 - AGGREGATE_CHECK_BYTES // 2)
+    with open(filepath, 'rb') as f:
+        for start in (0, middle, max(0, offset - AGGREGATE_CHECK_BYTES)):
+            f.seek(start)
+            digest.update(f.read(min(AGGREGATE_CHECK_BYTES, offset - start)))
+    return digest.hexdigest()
+
+
+def _load_aggregate_store(filepath: str, header: list):
+    """Load the aggregate store if it is still valid for this file, else None."""
+    try:
+        with open(filepath + AGGREGATE_STORE_SUFFIX) as f:
+            store = json.load(f)
+        locations_size = os.path.getsize(filepath + LOCATION_IDS_SUFFIX)
+    except (OSError, ValueError):
+        return None
+    # A new inode, a shorter file, a new header or changed bytes in the
+    # sampled blocks mean the file was replaced, truncated or rewritten,
+    # not just appended to
+    info = os.stat(filepath)
+    if store.get('header') != header or store.get('inode') != info.st_ino:
+        return None
+    if info.st_size < store['offset'] or locations_size < store['locations_size']:
+        return None
+    if _prefix_checksum(filepath, store['offset']) != store['checksum']:
+        return None
+    # Counts are saved as [key, count] pairs so a None key survives JSON
+    store['rock_types'] = dict(store['rock_types'])
+    return store
+
+
+def update_aggregate_store(filepath: str) -> dict:
+    """
+    Bring the materialized aggregates for a CSV file up to date.
+
+    The store remembers the byte offset it has processed up to, together
+    with the rock type counts and partial statistics (count, sum, min, max)
+    for every numeric column. Only rows appended after that offset are
+    read, and the sidecar is only rewritten when there were new rows. If
+    the file was truncated or rewritten, the aggregates are recomputed from
+    scratch. The (location, sample_id) pairs are appended to a separate
+    sidecar (filepath + '.locations.jsonl'), so counts and statistics do
+    not load every sample_id.
+
+    A rewrite is detected by the file's inode, its size and checksums of
+    three AGGREGATE_CHECK_BYTES blocks of the processed rows (at the start,
+    middle and end). An in-place edit that keeps the size and only touches
+    bytes outside those blocks is not detected; delete the sidecars after
+    editing a file in place.
+
+    Args:
+        filepath: Path to the CSV file
+
+    Returns:
+        Store dictionary with 'offset', 'rock_types', 'stats' and
+        'locations_size' (the valid length of the locations sidecar).
+        It is also saved to filepath + '.aggregates.json'.
+
+    Example:
+        store = update_aggregate_store('data/samples.csv')
+        store['rock_types']  # {'Granite': 12, 'Basalt': 17, ...}
+    """
+    header, data_offset = read_header_with_offset(filepath)
+    store = _load_aggregate_store(filepath, header)
+    fresh = store is None
+    if fresh:
+        store = {'header': header, 'offset': data_offset, 'rock_types': {},
+                 'stats': {}, 'locations_size': 0}
+    start = store['offset']
+
+    rock_index = header.index('rock_type') if 'rock_type' in header else None
+    location_index = header.index('location') if 'location' in header else None
+    id_index = header.index('sample_id') if 'sample_id' in header else None
+
+    with open(filepath + LOCATION_IDS_SUFFIX, 'wb' if fresh else 'r+b') as locations:
+        # Drop lines from an update that crashed before the store was saved
+        locations.truncate(store['locations_size'])
+        locations.seek(store['locations_size'])
+        for _, end, values in iter_records(filepath, start):
+            if rock_index is not None:
+                rock_type = _field(values, rock_index)
+                store['rock_types'][rock_type] = store['rock_types'].get(rock_type, 0) + 1
+            if location_index is not None and id_index is not None:
+                pair = [_field(values, location_index), _field(values, id_index)]
+                locations.write(json.dumps(pair).encode('utf-8') + b'\n')
+            for column, value in zip(header, values):
+                value = safe_convert_numeric(value)
+                if value is not None:
+                    _update_stats_state(store['stats'].setdefault(column, _new_stats_state()),
+                                        value)
+            store['offset'] = end
+        store['locations_size'] = locations.tell()
+
+    if fresh or store['offset'] != start:
+        saved = dict(store, rock_types=[[key, count]
+                                        for key, count in store['rock_types'].items()])
+        saved['inode'] = os.stat(filepath).st_ino
+        saved['checksum'] = _prefix_checksum(filepath, store['offset'])
+        temp_path = filepath + AGGREGATE_STORE_SUFFIX + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(saved, f)
+        os.replace(temp_path, filepath + AGGREGATE_STORE_SUFFIX)
+    return store
+
+
+def _read_location_ids(filepath: str) -> dict:
+    """Sample_ids per location from the locations sidecar, brought up to date first."""
+    store = update_aggregate_store(filepath)
+    groups = {}
+    with open(filepath + LOCATION_IDS_SUFFIX, 'rb') as f:
+        lines = f.read(store['locations_size']).rstrip(b'\n')
+    # One JSON array per line and no raw newlines inside, so parse in one call
+    for location, sample_id in json.loads(b'[' + lines.replace(b'\n', b',') + b']'):
+        groups.setdefault(location, []).append(sample_id)
+    return groups
+
+
+# =============================================================================
+# Multi-file aggregation: per-file partial states reduced in one process pool
+# =============================================================================
+
+def _partial_statistics(filepath: str, column: str) -> dict:
+    """Statistics partial state for one file."""
+    state = _new_stats_state()
+    for value in _numeric_values(filepath, column):
+        _update_stats_state(state, value)
+    return state
+
+
+def _partial_rock_type_counts(filepath: str) -> dict:
+    """Rock type counts for one file."""
+    header, _ = read_header_with_offset(filepath)
+    index = header.index('rock_type')
+    return dict(Counter(_field(values, index) for values in iter_rows(filepath)))
+
+
+def _partial_group_sums(filepath: str, group_column: str,
+                        value_column: str) -> dict:
+    """Per-group [sum, count] of a numeric column for one file."""
+    sums = {}
+    for groups, raw in _column_batches(filepath, [group_column, value_column]):
+        numbers, ok, _ = convert_column(raw)
+        for group, value in itertools.compress(zip(groups, numbers), ok):
+            group_sums = sums.setdefault(group, [0.0, 0])
+            group_sums[0] += value
+            group_sums[1] += 1
+    return sums
+
+
+def _finalize_group_sums(sums: dict) -> dict:
+    """Turn per-group [sum, count] pairs into rounded averages."""
+    return {group: round(total / count, 2) for group, (total, count) in sums.items()}
+
+
+def _expand_paths(paths) -> list:
+    """Accept a glob pattern or a list of paths and return a list of paths."""
+    if isinstance(paths, str):
+        return sorted(glob.glob(paths))
+    return list(paths)
+
+
+def _map_files(func, paths: list, args: tuple, max_workers: int) -> list:
+    """Run func(path, *args) for every path, in a process pool if worthwhile."""
+    if max_workers == 1 or len(paths) <= 1:
+        return [func(path, *args) for path in paths]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        repeated = [[arg] * len(paths) for arg in args]
+        return list(pool.map(func, paths, *repeated))
+
+
+def calculate_statistics_multi(paths, column: str, max_workers: int = None) -> dict:
+    """
+    Calculate statistics for a numeric column over many CSV files.
+
+    Each file is reduced to a partial state (count, sum, min, max) in a
+    process pool, then the partial states are merged.
+
+    Args:
+        paths: Glob pattern (e.g. 'data/campaign_*.csv') or list of paths
+        column: Name of the numeric column
+        max_workers: Number of worker processes (default: one per CPU,
+                     1 runs everything in this process)
+
+    Returns:
+        Same dictionary as calculate_statistics
+
+    Example:
+        stats = calculate_statistics_multi('data/campaign_*.csv', 'grade')
+        # {'count': 1200, 'sum': 2980.4, 'mean': 2.48, 'min': 0.1, 'max': 5.0}
+    """
+    state = _new_stats_state()
+    for partial in _map_files(_partial_statistics, _expand_paths(paths),
+                              (column,), max_workers):
+        _merge_stats_states(state, partial)
+    return _finalize_stats(state)
+
+
+def count_by_rock_type_multi(paths, max_workers: int = None) -> dict:
+    """
+    Count samples per rock type over many CSV files.
+
+    Args:
+        paths: Glob pattern or list of paths
+        max_workers: Number of worker processes (1 runs in this process)
+
+    Returns:
+        Same dictionary as count_by_rock_type
+
+    Example:
+        counts = count_by_rock_type_multi(['north.csv', 'south.csv'])
+        # {'Granite': 40, 'Basalt': 31, ...}
+    """
+    counts = {}
+    for partial in _map_files(_partial_rock_type_counts, _expand_paths(paths),
+                              (), max_workers):
+        for rock_type, count in partial.items():
+            counts[rock_type] = counts.get(rock_type, 0) + count
+    return counts
+
+
+def calculate_average_by_group_multi(paths, group_column: str, value_column: str,
+                                     max_workers: int = None) -> dict:
+    """
+    Calculate grouped averages over many CSV files.
+
+    Args:
+        paths: Glob pattern or list of paths
+        group_column: Column to group by (e.g., 'location', 'rock_type')
+        value_column: Numeric column to average (e.g., 'grade', 'depth')
+        max_workers: Number of worker processes (1 runs in this process)
+
+    Returns:
+        Same dictionary as calculate_average_by_group
+
+    Example:
+        averages = calculate_average_by_group_multi('data/*.csv', 'location', 'grade')
+        # {'Site-A': 2.45, 'Site-B': 3.12}
+    """
+    sums = {}
+    for partial in _map_files(_partial_group_sums, _expand_paths(paths),
+                              (group_column, value_column), max_workers):
+        for group, (total, count) in partial.items():
+            merged = sums.setdefault(group, [0.0, 0])
+            merged[0] += total
+            merged[1] += count
+    return _finalize_group_sums(sums)
+
+
+# =============================================================================
+# Lazy query builder: filter, group and aggregate fused into one scan
+# =============================================================================
+
+_FILTER_OPS = {
+    '==': operator.eq, '!=': operator.ne,
+    '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge,
+}
+_AGG_FUNCS = ('count', 'sum', 'mean', 'min', 'max')
+
+
+class Dataset:
+    """
+    Lazy query over a CSV file.
+
+    Each method returns a new Dataset with one more step in its plan;
+    nothing is read until collect() is called. The whole plan then runs as
+    a single streaming scan: predicates are checked against the raw row
+    values before any dictionary is built, only the needed columns are
+    extracted, numeric range predicates use the zone map (if one exists)
+    to skip blocks, and groups are aggregated on the fly.
+
+    Example:
+        result = (Dataset('data/samples.csv')
+                  .filter('depth', '>=', 100)
+                  .filter('depth', '<=', 200)
+                  .group_by('location')
+                  .agg(mean_grade=('grade', 'mean'), samples=('grade', 'count'))
+                  .collect())
+        # {'Site-A': {'mean_grade': 1.25, 'samples': 6}, 'Site-B': {...}}
+    """
+
+    def __init__(self, filepath: str):
+        self.filepath = filepath
+        self._filters = []
+        self._columns = None
+        self._group_columns = []
+        self._aggregations = {}
+
+    def _copy(self) -> 'Dataset':
+        other = Dataset(self.filepath)
+        other._filters = list(self._filters)
+        other._columns = self._columns
+        other._group_columns = list(self._group_columns)
+        other._aggregations = dict(self._aggregations)
+        return other
+
+    def filter(self, column: str, op: str, value) -> 'Dataset':
+        """
+        Keep rows where `column op value` holds.
+
+        op is one of ==, !=, <, <=, >, >=. A numeric value compares the
+        column as a number (rows that are not numbers never match);
+        a string value compares the raw text.
+        """
+        if op not in _FILTER_OPS:
+            raise ValueError(f"Unknown filter operator: {op}")
+        other = self._copy()
+        other._filters.append((column, op, value))
+        return other
+
+    def select(self, *columns: str) -> 'Dataset':
+        """Return only these columns from collect() (ungrouped queries)."""
+        other = self._copy()
+        other._columns = list(columns)
+        return other
+
+    def group_by(self, *columns: str) -> 'Dataset':
+        """Group rows by one or more columns."""
+        other = self._copy()
+        other._group_columns = list(columns)
+        return other
+
+    def agg(self, **aggregations) -> 'Dataset':
+        """
+        Add aggregations as name=(column, func).
+
+        func is one of count, sum, mean, min, max. Numeric functions
+        skip values that cannot be converted to float.
+        """
+        other = self._copy()
+        for name, (column, func) in aggregations.items():
+            if func not in _AGG_FUNCS:
+                raise ValueError(f"Unknown aggregate function: {func}")
+            other._aggregations[name] = (column, func)
+        return other
+
+    def _read_columns(self, header: list) -> list:
+        """Columns the scan has to extract, in header order."""
+        if self._group_columns or self._aggregations:
+            needed = set(self._group_columns)
+            needed.update(column for column, _ in self._aggregations.values())
+        elif self._columns is not None:
+            needed = set(self._columns)
+        else:
+            needed = set(header)
+        needed.update(column for column, _, _ in self._filters)
+        missing = needed - set(header)
+        if missing:
+            raise KeyError(f"Unknown column(s): {', '.join(sorted(missing))}")
+        return [column for column in header if column in needed]
+
+    def _zone_map_bounds(self):
+        """Pick one numeric column to prune blocks on: (column, low, high, include_low)."""
+        for column, _, _ in self._filters:
+            low = high = None
+            include_low = True
+            for other_column, op, value in self._filters:
+                if other_column != column or isinstance(value, str):
+                    continue
+                if op in ('>=', '>', '=='):
+                    inclusive = op != '>'
+                    if low is None or value > low or (value == low and not inclusive):
+                        low, include_low = value, inclusive
+                if op in ('<=', '<', '==') and (high is None or value < high):
+                    high = value
+            if low is not None or high is not None:
+                return column, low, high, include_low
+        return None
+
+    def explain(self) -> str:
+        """Describe how collect() will execute the plan."""
+        header, _ = read_header_with_offset(self.filepath)
+        lines = [f"Dataset plan for {self.filepath}"]
+        lines.append(f"  Scan: columns read = {', '.join(self._read_columns(header))}")
+        if self._filters:
+            pushed = ', '.join(f"{column} {op} {value!r}" for column, op, value in self._filters)
+            lines.append(f"  Pushed into reader: {pushed}")
+        bounds = self._zone_map_bounds()
+        zone_map = load_zone_map(self.filepath)
+        if bounds and zone_map and bounds[0] in zone_map['columns']:
+            column, low, high, _ = bounds
+            lines.append(f"  Block skipping: zone map on {column} [{low}, {high}]")
+        else:
+            lines.append("  Block skipping: none (full scan)")
+        if self._group_columns:
+            lines.append(f"  Group by: {', '.join(self._group_columns)}")
+        for name, (column, func) in self._aggregations.items():
+            lines.append(f"  Aggregate: {name} = {func}({column})")
+        return '\n'.join(lines)
+
+    def collect(self):
+        """
+        Execute the plan in one streaming scan.
+
+        Returns:
+            - grouped query: {group_key: {agg_name: value}} where group_key is
+              the value (one group column) or a tuple of values
+            - aggregate without group_by: {agg_name: value}
+            - otherwise: list of row dictionaries (selected columns only)
+        """
+        header, _ = read_header_with_offset(self.filepath)
+        index = {column: i for i, column in enumerate(header)}
+        read_columns = self._read_columns(header)
+        predicates = [
+            (index[column], _FILTER_OPS[op], value, not isinstance(value, str))
+            for column, op, value in self._filters
+        ]
+
+        bounds = self._zone_map_bounds()
+        if bounds:
+            column, low, high, include_low = bounds
+            ranges = _candidate_ranges(self.filepath, column, low, high, include_low)
+        else:
+            ranges = [(None, None)]
+
+        grouped = bool(self._group_columns or self._aggregations)
+        aggregations = self._aggregations or {'count': (read_columns[0], 'count')}
+        group_indices = [index[column] for column in self._group_columns]
+        agg_plan = [(name, index[column], func) for name, (column, func) in aggregations.items()]
+        output_columns = self._columns or read_columns
+        output_indices = [(column, index[column]) for column in output_columns]
+
+        groups = {}
+        rows = []
+        for start, end in ranges:
+            for values in iter_rows(self.filepath, start, end):
+                if not _matches(values, predicates):
+                    continue
+                if not grouped:
+                    rows.append({column: _field(values, i) for column, i in output_indices})
+                    continue
+                if len(group_indices) == 1:
+                    key = _field(values, group_indices[0])
+                else:
+                    key = tuple(_field(values, i) for i in group_indices)
+                states = groups.get(key)
+                if states is None:
+                    states = groups[key] = {name: None for name, _, _ in agg_plan}
+                for name, i, func in agg_plan:
+                    states[name] = _update_agg(states[name], func, _field(values, i))
+
+        if not grouped:
+            return rows
+        results = {
+            key: {name: _finalize_agg(state, func)
+                  for (name, _, func), state in zip(agg_plan, states.values())}
+            for key, states in groups.items()
+        }
+        if not self._group_columns:
+            # Without group_by every row falls into the single group ()
+            return results.get((), {
+                name: _finalize_agg(None, func) for name, _, func in agg_plan
+            })
+        return results
+
+
+def _matches(values: list, predicates: list) -> bool:
+    """Check raw row values against compiled (index, op, value, numeric) predicates."""
+    for index, op, value, numeric in predicates:
+        field = _field(values, index)
+        if numeric:
+            field = safe_convert_numeric(field)
+            if field is None:
+                return False
+        if not op(field, value):
+            return False
+    return True
+
+
+def _update_agg(state, func: str, raw):
+    """Fold one raw value into an aggregation state."""
+    if func == 'count':
+        return (state or 0) + 1
+    value = safe_convert_numeric(raw)
+    if value is None:
+        return state
+    if func in ('sum', 'mean'):
+        total, count = state or (0.0, 0)
+        return (total + value, count + 1)
+    if state is None:
+        return value
+    return min(state, value) if func == 'min' else max(state, value)
+
+
+def _finalize_agg(state, func: str):
+    """Turn an aggregation state into its final (rounded) value."""
+    if func == 'count':
+        return state or 0
+    if state is None:
+        return None
+    if func == 'sum':
+        return round(state[0], 2)
+    if func == 'mean':
+        return round(state[0] / state[1], 2)
+    return state
+
+
+# =============================================================================
+# Memoized query results keyed on file fingerprint and arguments
+# =============================================================================
+
+class QueryCache:
+    """
+    Cache of query results keyed on (file fingerprint, function, arguments).
+
+    Results live in a size-bounded in-memory LRU and, if cache_dir is given,
+    also as pickle files on disk so they survive restarts. Because the key
+    includes the file's size and modification time, a changed file never
+    returns a stale result. When a result is stored, entries for an older
+    fingerprint of the same file are dropped from memory and disk, and the
+    disk tier is trimmed to its max_disk_entries most recently used files.
+    invalidate() drops entries explicitly.
+
+    Example:
+        cache = QueryCache(max_entries=64, cache_dir='.query_cache')
+        rows = cache.get_or_compute(find_depth_range_samples,
+                                    'data/samples.csv', 100, 200)
+    """
+
+    def __init__(self, max_entries: int = 128, cache_dir: str = None,
+                 max_disk_entries: int = 1024):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def _key(self, func, filepath: str, args: tuple, kwargs: dict) -> tuple:
+        return (os.path.abspath(filepath), tuple(file_fingerprint(filepath)),
+                f"{func.__module__}.{func.__qualname__}",
+                repr(args), repr(sorted(kwargs.items())))
+
+    def _disk_prefix(self, key: tuple) -> tuple:
+        """Hashes of the path and of the fingerprint that start a disk file's name."""
+        return (hashlib.sha256(key[0].encode()).hexdigest()[:16],
+                hashlib.sha256(repr(key[1]).encode()).hexdigest()[:16])
+
+    def _disk_path(self, key: tuple) -> str:
+        # Prefix with hashes of the path and fingerprint so invalidate() and
+        # _evict_stale() can find a file's entries by name
+        path_hash, fingerprint_hash = self._disk_prefix(key)
+        key_hash = hashlib.sha256(repr(key).encode()).hexdigest()[:32]
+        return os.path.join(self.cache_dir,
+                            f"{path_hash}-{fingerprint_hash}-{key_hash}.pkl")
+
+    def _evict_stale(self, key: tuple) -> None:
+        """Drop entries for other fingerprints of key's file and trim the disk tier."""
+        for stale in [k for k in self._entries if k[0] == key[0] and k[1] != key[1]]:
+            del self._entries[stale]
+        if not self.cache_dir:
+            return
+        path_hash, fingerprint_hash = self._disk_prefix(key)
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith('.pkl'):
+                continue
+            if (entry.name.startswith(path_hash + '-')
+                    and not entry.name.startswith(f"{path_hash}-{fingerprint_hash}-")):
+                os.remove(entry.path)
+            else:
+                files.append((entry.stat().st_mtime_ns, entry.path))
+        # Hits touch their file, so the oldest mtimes are least recently used
+        files.sort()
+        for _, path in files[:max(0, len(files) - self.max_disk_entries)]:
+            os.remove(path)
+
+    def _remember(self, key: tuple, value) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_compute(self, func, filepath: str, *args, **kwargs):
+        """
+        Return func(filepath, *args, **kwargs), computing it only on a miss.
+
+        A copy of the cached result is returned, so callers may modify it.
+        """
+        key = self._key(func, filepath, args, kwargs)
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return copy.deepcopy(self._entries[key])
+
+        if self.cache_dir:
+            try:
+                with open(self._disk_path(key), 'rb') as f:
+                    value = pickle.load(f)
+                os.utime(self._disk_path(key))
+                self.hits += 1
+                self._remember(key, value)
+                return copy.deepcopy(value)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                pass
+
+        self.misses += 1
+        value = func(filepath, *args, **kwargs)
+        self._remember(key, value)
+        if self.cache_dir:
+            temp_path = self._disk_path(key) + '.tmp'
+            with open(temp_path, 'wb') as f:
+                pickle.dump(value, f)
+            os.replace(temp_path, self._disk_path(key))
+        self._evict_stale(key)
+        return copy.deepcopy(value)
+
+    def invalidate(self, filepath: str = None) -> int:
+        """
+        Drop cached results for one file, or everything if filepath is None.
+
+        Returns:
+            Number of in-memory entries removed
+        """
+        if filepath is None:
+            removed = len(self._entries)
+            self._entries.clear()
+            prefix = ''
+        else:
+            path = os.path.abspath(filepath)
+            stale = [key for key in self._entries if key[0] == path]
+            for key in stale:
+                del self._entries[key]
+            removed = len(stale)
+            prefix = hashlib.sha256(path.encode()).hexdigest()[:16] + '-'
+        if self.cache_dir:
+            for name in os.listdir(self.cache_dir):
+                if name.startswith(prefix) and name.endswith('.pkl'):
+                    os.remove(os.path.join(self.cache_dir, name))
+        return removed
+
+
+_query_cache = QueryCache()
+
+
+def cached_query(func, filepath: str, *args, **kwargs):
+    """
+    Call a lab4_data_processor function through the shared query cache.
+
+    Args:
+        func: Function taking the CSV path first, e.g. find_depth_range_samples
+        filepath: Path to the CSV file
+        *args, **kwargs: Remaining arguments for func
+
+    Returns:
+        The (possibly cached) result of func(filepath, *args, **kwargs)
+
+    Example:
+        averages = cached_query(calculate_average_by_group,
+                                'data/samples.csv', 'location', 'grade')
+    """
+    return _query_cache.get_or_compute(func, filepath, *args, **kwargs)
+
+
+def invalidate_query_cache(filepath: str = None) -> int:
+    """Drop shared cache entries for filepath (or all); returns the number removed."""
+    return _query_cache.invalidate(filepath)
+
+
+# =============================================================================
+# Joins between sample files and per-location metadata
+# =============================================================================
+
+def _join_header(left_header: list, right_header: list, on: str) -> list:
+    """Output columns of a join: left columns, then right columns except `on`."""
+    names = list(left_header)
+    for column in right_header:
+        if column != on:
+            names.append(f"right_{column}" if column in left_header else column)
+    return names
+
+
+def _hash_join_rows(left_path: str, right_path: str, on: str, how: str,
+                    build_left: bool):
+    """Yield joined rows, building a hash table on one side and streaming the other."""
+    left_header, _ = read_header_with_offset(left_path)
+    right_header, _ = read_header_with_offset(right_path)
+    left_index, right_index = left_header.index(on), right_header.index(on)
+    right_keep = [i for i, column in enumerate(right_header) if column != on]
+
+    def combine(left, right):
+        left = left + [''] * (len(left_header) - len(left))
+        return left + [_field(right, i) or '' for i in right_keep]
+
+    build_path, build_index = (left_path, left_index) if build_left else (right_path, right_index)
+    table = {}
+    for values in iter_rows(build_path):
+        table.setdefault(_field(values, build_index), []).append(values)
+
+    if build_left:
+        # Inner join only: stream the right side, keep the right side's order
+        for right in iter_rows(right_path):
+            for left in table.get(_field(right, right_index), ()):
+                yield combine(left, right)
+        return
+    for left in iter_rows(left_path):
+        matches = table.get(_field(left, left_index))
+        if matches:
+            for right in matches:
+                yield combine(left, right)
+        elif how == 'left':
+            yield combine(left, [])
+
+
+def _sort_merge_join_rows(left_sorted: str, right_sorted: str, on: str, how: str):
+    """Yield joined rows from two files already sorted on `on`."""
+    left_header, _ = read_header_with_offset(left_sorted)
+    right_header, _ = read_header_with_offset(right_sorted)
+    left_index, right_index = left_header.index(on), right_header.index(on)
+    right_keep = [i for i, column in enumerate(right_header) if column != on]
+    rights = iter_rows(right_sorted)
+
+    right = next(rights, None)
+    group_key, group = None, []
+    for left in iter_rows(left_sorted):
+        key = _field(left, left_index) or ''
+        if key != group_key:
+            # Collect the run of right rows with this key (only one key in memory)
+            while right is not None and (_field(right, right_index) or '') < key:
+                right = next(rights, None)
+            group_key, group = key, []
+            while right is not None and (_field(right, right_index) or '') == key:
+                group.append(right)
+                right = next(rights, None)
+        left = left + [''] * (len(left_header) - len(left))
+        if group:
+            for match in group:
+                yield left + [_field(match, i) or '' for i in right_keep]
+        elif how == 'left':
+            yield left + [''] * len(right_keep)
+
+
+def join(left_path: str, right_path: str, on: str, output_path: str,
+         how: str = 'inner', method: str = 'auto',
+         max_memory_bytes: int = HASH_JOIN_MAX_BYTES) -> int:
+    """
+    Join two CSV files on a key column and write the result as CSV.
+
+    A hash join is used when one side fits in memory (for a left join this
+    must be the right side); otherwise both files are sorted on disk with
+    sort_csv_by_column and joined with a streaming sort-merge join.
+
+    Args:
+        left_path: Path to the left CSV file (e.g. samples)
+        right_path: Path to the right CSV file (e.g. site metadata)
+        on: Column present in both files to join on
+        output_path: Path to the output CSV file
+        how: 'inner' (matching rows only) or 'left' (keep every left row)
+        method: 'auto', 'hash' or 'sort_merge'
+        max_memory_bytes: Largest file size 'auto' will load into a hash table
+
+    Returns:
+        Number of data rows written
+
+    Output columns are the left columns followed by the right columns except
+    `on`; right columns whose name clashes with a left column get a
+    'right_' prefix. Unmatched rows of a left join have empty right columns.
+
+    Example:
+        count = join('data/samples.csv', 'data/sites.csv', 'location',
+                     'enriched.csv', how='left')
+    """
+    if how not in ('inner', 'left'):
+        raise ValueError(f"Unknown join type: {how}")
+    if method not in ('auto', 'hash', 'sort_merge'):
+        raise ValueError(f"Unknown join method: {method}")
+
+    left_header, _ = read_header_with_offset(left_path)
+    right_header, _ = read_header_with_offset(right_path)
+    output_header = _join_header(left_header, right_header, on)
+    left_size = os.path.getsize(left_path)
+    right_size = os.path.getsize(right_path)
+
+    if method == 'auto':
+        fits = right_size <= max_memory_bytes or (how == 'inner' and
+                                                  left_size <= max_memory_bytes)
+        method = 'hash' if fits else 'sort_merge'
+    if method == 'hash':
+        # Build on the smaller side when the join type allows it
+        build_left = how == 'inner' and left_size < right_size
+        rows = _hash_join_rows(left_path, right_path, on, how, build_left)
+        return write_samples_from_list(output_path, output_header, rows)
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    with tempfile.TemporaryDirectory(dir=output_dir) as temp_dir:
+        left_sorted = os.path.join(temp_dir, 'left.csv')
+        right_sorted = os.path.join(temp_dir, 'right.csv')
+        sort_csv_by_column(left_path, left_sorted, on)
+        sort_csv_by_column(right_path, right_sorted, on)
+        rows = _sort_merge_join_rows(left_sorted, right_sorted, on, how)
+        return write_samples_from_list(output_path, output_header, rows)
+
+
+# =============================================================================
+# Top-k per group
+# =============================================================================
+
+def top_k_by_group(filepath: str, group_column: str, value_column: str,
+                   k: int) -> dict:
+    """
+    Find the k rows with the highest value in each group, in one scan.
+
+    One bounded min-heap of size k is kept per group, so memory is
+    O(groups x k) however large the file is. Rows whose value is not a
+    number are skipped; ties keep the row that appears first.
+
+    Args:
+        filepath: Path to the CSV file
+        group_column: Column to group by (e.g., 'location', 'rock_type')
+        value_column: Numeric column to rank by (e.g., 'grade')
+        k: Number of rows to keep per group
+
+    Returns:
+        Dictionary with group values as keys and lists of row dictionaries
+        as values, sorted by value (descending)
+
+    Example:
+        top = top_k_by_group('data/samples.csv', 'location', 'grade', 3)
+        # {'Site-A': [{'sample_id': 'GEO-015', 'grade': '4.46', ...}, ...], ...}
+    """
+    header, _ = read_header_with_offset(filepath)
+    group_index, value_index = header.index(group_column), header.index(value_column)
+
+    heaps = {}
+    for row_number, values in enumerate(iter_rows(filepath)):
+        value = safe_convert_numeric(_field(values, value_index))
+        if value is None or k <= 0:
+            continue
+        heap = heaps.setdefault(_field(values, group_index), [])
+        # -row_number makes later rows "smaller", so earlier rows win ties
+        entry = (value, -row_number, values)
+        if len(heap) < k:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    return {
+        group: [dict(zip(header, values)) for _, _, values in sorted(heap, reverse=True)]
+        for group, heap in heaps.items()
+    }
+
+
+# =============================================================================
+# Depth binning and depth-profile histograms
+# =============================================================================
+
+def _bin_python(bin_values: list, values: list, edges: list, bin_width: float) -> dict:
+    """Pure Python binning: bin index -> [count, value_count, sum, min, max]."""
+    bins = {}
+    last = len(edges) - 2 if edges is not None else None
+    for x, v in zip(bin_values, values):
+        if edges is not None:
+            if x < edges[0] or x > edges[-1]:
+                continue
+            index = min(bisect.bisect_right(edges, x) - 1, last)
+        else:
+            index = math.floor(x / bin_width)
+        state = bins.setdefault(index, [0, 0, 0.0, None, None])
+        state[0] += 1
+        if v is not None:
+            state[1] += 1
+            state[2] += v
+            state[3] = v if state[3] is None else min(state[3], v)
+            state[4] = v if state[4] is None else max(state[4], v)
+    return bins
+
+
+def _bin_numpy(bin_values: list, values: list, edges: list, bin_width: float) -> dict:
+    """Vectorized binning with NumPy, same result shape as _bin_python."""
+    x = np.asarray(bin_values, dtype=float)
+    v = np.asarray([np.nan if value is None else value for value in values], dtype=float)
+    if edges is not None:
+        edge_array = np.asarray(edges, dtype=float)
+        inside = (x >= edge_array[0]) & (x <= edge_array[-1])
+        x, v = x[inside], v[inside]
+        index = np.minimum(np.searchsorted(edge_array, x, side='right') - 1,
+                           len(edges) - 2)
+    else:
+        index = np.floor(x / bin_width).astype(np.int64)
+    if index.size == 0:
+        return {}
+    offset = int(index.min())
+    index = index - offset
+    has_value = ~np.isnan(v)
+    counts = np.bincount(index)
+    value_counts = np.bincount(index, weights=has_value)
+    sums = np.bincount(index, weights=np.where(has_value, v, 0.0))
+    mins = np.full(counts.size, np.inf)
+    maxs = np.full(counts.size, -np.inf)
+    np.minimum.at(mins, index[has_value], v[has_value])
+    np.maximum.at(maxs, index[has_value], v[has_value])
+    return {
+        i + offset: [int(counts[i]), int(value_counts[i]), float(sums[i]),
+                     float(mins[i]) if value_counts[i] else None,
+                     float(maxs[i]) if value_counts[i] else None]
+        for i in np.nonzero(counts)[0].tolist()
+    }
+
+
+def _merge_bins(bins: dict, other: dict) -> None:
+    """Merge the per-bin states of other into bins."""
+    for index, (count, value_count, total, low, high) in other.items():
+        state = bins.get(index)
+        if state is None:
+            bins[index] = [count, value_count, total, low, high]
+            continue
+        state[0] += count
+        state[1] += value_count
+        state[2] += total
+        if low is not None:
+            state[3] = low if state[3] is None else min(state[3], low)
+            state[4] = high if state[4] is None else max(state[4], high)
+
+
+def calculate_binned_statistics(filepath: str, bin_column: str = 'depth',
+                                value_column: str = 'grade', bin_width: float = 50,
+                                edges: list = None, use_numpy: bool = None) -> list:
+    """
+    Count rows and summarise a value per bin of another column, in one pass.
+
+    This gives a depth profile (e.g. samples and mean grade per 50 m) with
+    one scan instead of one find_depth_range_samples call per bin.
+
+    Args:
+        filepath: Path to the CSV file
+        bin_column: Numeric column to bin on (e.g. 'depth')
+        value_column: Numeric column to summarise per bin (e.g. 'grade')
+        bin_width: Width of equal bins starting at multiples of bin_width
+                   (used when edges is not given; only non-empty bins are returned)
+        edges: Optional sorted bin edges; bins are [edge_i, edge_i+1) and the
+               last bin also includes its right edge. Every bin is returned,
+               and rows outside the edges are ignored.
+        use_numpy: Force (True) or disable (False) the vectorized NumPy path;
+                   by default it is used when NumPy is installed
+
+    Returns:
+        List of dictionaries, one per bin in order, with 'bin_start',
+        'bin_end', 'count' (rows in the bin) and 'mean', 'min', 'max' of
+        value_column (None when the bin has no numeric values)
+
+    Example:
+        profile = calculate_binned_statistics('data/samples.csv', 'depth', 'grade')
+        # [{'bin_start': 50, 'bin_end': 100, 'count': 7, 'mean': 2.1,
+        #   'min': 0.77, 'max': 3.96}, ...]
+    """
+    if edges is not None and len(edges) < 2:
+        raise ValueError("edges needs at least two values")
+    if use_numpy is None:
+        use_numpy = np is not None
+    binner = _bin_numpy if use_numpy else _bin_python
+
+    # Bin one batch at a time and merge the per-bin states, so memory
+    # depends on the number of bins rather than the size of the file
+    bins = {}
+    for raw_bins, raw_values in _column_batches(filepath, [bin_column, value_column]):
+        bin_numbers, bin_ok, _ = convert_column(raw_bins)
+        value_numbers, value_ok, _ = convert_column(raw_values)
+        # Rows without a finite bin value ('', 'n/a', 'nan', 'inf') are
+        # dropped; missing or NaN values become None
+        keep = [ok and math.isfinite(x) for x, ok in zip(bin_numbers, bin_ok)]
+        bin_values = list(itertools.compress(bin_numbers, keep))
+        values = [value if ok and not math.isnan(value) else None for value, ok in
+                  itertools.compress(zip(value_numbers, value_ok), keep)]
+        _merge_bins(bins, binner(bin_values, values, edges, bin_width))
+
+    if edges is not None:
+        indices = range(len(edges) - 1)
+        bounds = {i: (edges[i], edges[i + 1]) for i in indices}
+    else:
+        indices = sorted(bins)
+        bounds = {i: (i * bin_width, (i + 1) * bin_width) for i in indices}
+
+    profile = []
+    for i in indices:
+        count, value_count, total, low, high = bins.get(i, [0, 0, 0.0, None, None])
+        profile.append({
+            'bin_start': bounds[i][0],
+            'bin_end': bounds[i][1],
+            'count': count,
+            'mean': round(total / value_count, 2) if value_count else None,
+            'min': None if low is None else round(low, 2),
+            'max': None if high is None else round(high, 2),
+        })
+    return profile
+
+
+# =============================================================================
+# Cross-tabulation
+# =============================================================================
+
+def pivot(filepath: str, rows: str, cols: str, value: str = None,
+          agg: str = 'count', output_path: str = None) -> dict:
+    """
+    Build a cross-tab (pivot table) of two columns in one scan.
+
+    Args:
+        filepath: Path to the CSV file
+        rows: Column whose values become the table rows (e.g. 'rock_type')
+        cols: Column whose values become the table columns (e.g. 'location')
+        value: Numeric column to aggregate (not needed for 'count')
+        agg: One of count, sum, mean, min, max
+        output_path: Optional path to also write the table as CSV
+
+    Returns:
+        Nested dictionary {row_label: {col_label: value}} with every label
+        combination; empty cells are 0 for count and None otherwise
+
+    Example:
+        table = pivot('data/samples.csv', 'rock_type', 'location')
+        # {'Basalt': {'Site-A': 10, 'Site-B': 7}, 'Granite': {...}, ...}
+        table = pivot('data/samples.csv', 'rock_type', 'location',
+                      value='grade', agg='mean', output_path='pivot.csv')
+    """
+    if agg not in _AGG_FUNCS:
+        raise ValueError(f"Unknown aggregate function: {agg}")
+    if value is None and agg != 'count':
+        raise ValueError("value is required unless agg is 'count'")
+    header, _ = read_header_with_offset(filepath)
+    row_index, col_index = header.index(rows), header.index(cols)
+    value_index = header.index(value) if value is not None else row_index
+
+    cells = {}
+    for values in iter_rows(filepath):
+        cell = (_field(values, row_index), _field(values, col_index))
+        cells[cell] = _update_agg(cells.get(cell), agg, _field(values, value_index))
+
+    row_labels = sorted({row for row, _ in cells}, key=str)
+    col_labels = sorted({col for _, col in cells}, key=str)
+    table = {
+        row: {col: _finalize_agg(cells.get((row, col)), agg) for col in col_labels}
+        for row in row_labels
+    }
+
+    if output_path is not None:
+        write_samples_from_list(
+            output_path, [rows] + col_labels,
+            ([row] + ['' if table[row][col] is None else table[row][col]
+                      for col in col_labels] for row in row_labels),
+        )
+    return table
+
+
+# =============================================================================
+# Streaming diff between two versions of a sample file
+# =============================================================================
+
+def _row_digest(values: list) -> bytes:
+    """Short hash of a row, used to compare two versions of it."""
+    return hashlib.blake2b('\x1f'.join(values).encode('utf-8'), digest_size=16).digest()
+
+
+def csv_diff(old_path: str, new_path: str, key_column: str, output_path: str,
+             chunk_rows: int = 100000) -> dict:
+    """
+    Compare two versions of a CSV file and write the differences as CSV.
+
+    Both files are sorted on key_column on disk (at most chunk_rows rows in
+    memory at a time) and then walked side by side, so memory stays bounded
+    however big the exports are. Rows are compared by a hash of their values
+    in the new file's column order. Keys are assumed to be unique.
+
+    Args:
+        old_path: Path to the previous version of the CSV file
+        new_path: Path to the revised CSV file
+        key_column: Column that identifies a row (e.g. 'sample_id')
+        output_path: Path to the output CSV file; it has a 'change' column
+                     ('added', 'removed' or 'changed') followed by the new
+                     file's columns (the new values for changed rows)
+        chunk_rows: Maximum number of rows sorted in memory at once
+
+    Returns:
+        Dictionary with the number of 'added', 'removed' and 'changed' rows
+
+    Example:
+        counts = csv_diff('samples_week1.csv', 'samples_week2.csv',
+                          'sample_id', 'changes.csv')
+        # {'added': 3, 'removed': 1, 'changed': 2}
+    """
+    old_header, _ = read_header_with_offset(old_path)
+    new_header, _ = read_header_with_offset(new_path)
+    # Project old rows onto the new columns so both sides compare alike
+    old_positions = [old_header.index(c) if c in old_header else None for c in new_header]
+    key_index = new_header.index(key_column)
+    counts = {'added': 0, 'removed': 0, 'changed': 0}
+
+    def project_old(values):
+        return [values[i] if i is not None and i < len(values) else '' for i in old_positions]
+
+    def pad_new(values):
+        return values + [''] * (len(new_header) - len(values))
+
+    def changes(old_sorted, new_sorted):
+        olds = (project_old(v) for v in iter_rows(old_sorted))
+        news = (pad_new(v) for v in iter_rows(new_sorted))
+        old_row, new_row = next(olds, None), next(news, None)
+        while old_row is not None or new_row is not None:
+            old_key = old_row[key_index] if old_row is not None else None
+            new_key = new_row[key_index] if new_row is not None else None
+            if new_row is None or (old_row is not None and old_key < new_key):
+                counts['removed'] += 1
+                yield ['removed'] + old_row
+                old_row = next(olds, None)
+            elif old_row is None or new_key < old_key:
+                counts['added'] += 1
+                yield ['added'] + new_row
+                new_row = next(news, None)
+            else:
+                if _row_digest(old_row) != _row_digest(new_row):
+                    counts['changed'] += 1
+                    yield ['changed'] + new_row
+                old_row, new_row = next(olds, None), next(news, None)
+
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    with tempfile.TemporaryDirectory(dir=output_dir) as temp_dir:
+        old_sorted = os.path.join(temp_dir, 'old.csv')
+        new_sorted = os.path.join(temp_dir, 'new.csv')
+        sort_csv_by_column(old_path, old_sorted, key_column, chunk_rows)
+        sort_csv_by_column(new_path, new_sorted, key_column, chunk_rows)
+        write_samples_from_list(output_path, ['change'] + new_header,
+                                changes(old_sorted, new_sorted))
+    return counts
 
 
 # =============================================================================
@@ -9,17 +9,63 @@ Learning Outcomes:
 """
 
 import csv
+import itertools
+import json
+import mmap
+import os
+import shutil
+import tempfile
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import lru_cache
 
+from lab4_csv_reader import (
+    file_fingerprint, iter_records, iter_rows, read_header_with_offset, split_record_chunks
+)
 
-def safe_read_file(filepath: str) -> tuple:
+# Default chunk size when validation is split across processes
+VALIDATION_CHUNK_BYTES = 8 * 1024 * 1024
+
+# Rows are read and checked this many at a time
+VALIDATION_BATCH_ROWS = 8192
+
+# Checkpointed jobs save their progress after this many rows
+CHECKPOINT_EVERY_ROWS = 100000
+
+# safe_read_file(mode='auto') maps files larger than this instead of reading them
+AUTO_MMAP_BYTES = 64 * 1024 * 1024
+
+# Default chunk size for safe_read_file(mode='chunks'), in characters
+READ_CHUNK_SIZE = 1024 * 1024
+
+# get_file_info counts newlines in blocks of this many bytes
+LINE_COUNT_BLOCK_BYTES = 1024 * 1024
+
+# get_directory_file_info remembers this many files between calls
+FILE_INFO_CACHE_SIZE = 10000
+
+
+def safe_read_file(filepath: str, mode: str = 'text', max_bytes: int = None,
+                   chunk_size: int = READ_CHUNK_SIZE) -> tuple:
     """
     Safely read a file with proper error handling.
 
     Args:
         filepath: Path to the file to read
+        mode: How to return the content:
+              - 'text': the whole file as one str (default)
+              - 'mmap': a read-only mmap of the file's bytes (a memoryview of
+                b'' for an empty file); close it when done
+              - 'chunks': a generator of str chunks of up to chunk_size
+                characters; the file is closed when the generator finishes
+              - 'auto': 'text' up to AUTO_MMAP_BYTES, 'mmap' above that
+        max_bytes: If given, refuse files larger than this many bytes
+        chunk_size: Chunk size for mode='chunks'
 
     Returns:
-        Tuple of (success: bool, content_or_error: str)
+        Tuple of (success: bool, content_or_error)
         If successful: (True, file_content)
         If error: (False, error_message)
 
@@ -31,14 +77,46 @@ def safe_read_file(filepath: str) -> tuple:
         success, result = safe_read_file('missing.txt')
         if not success:
             print(f"Error: {result}")  # "File not found: missing.txt"
+
+        success, data = safe_read_file('big.csv', mode='mmap')
+        if success:
+            with data:
+                print(data[:40])  # b'sample_id,rock_type,grade,depth,...'
     """
-    # TODO: Implement this function
-    # Use try/except to handle errors:
-    # - FileNotFoundError: return (False, "File not found: {filepath}")
-    # - PermissionError: return (False, "Permission denied: {filepath}")
-    # - Exception: return (False, "Error reading file: {str(e)}")
-    # If successful: return (True, file_content)
-    pass
+    if mode not in ('text', 'mmap', 'chunks', 'auto'):
+        raise ValueError(f"Unknown mode: {mode!r}")
+    try:
+        size = os.path.getsize(filepath)
+        if max_bytes is not None and size > max_bytes:
+            return (False, f"File too large: {filepath} ({size} bytes, limit {max_bytes})")
+        if mode == 'auto':
+            mode = 'mmap' if size > AUTO_MMAP_BYTES else 'text'
+        if mode == 'text':
+            with open(filepath) as f:
+                return (True, f.read())
+        if mode == 'chunks':
+            return (True, _read_chunks(open(filepath), chunk_size))
+        # mmap cannot map an empty file
+        if size == 0:
+            return (True, memoryview(b''))
+        with open(filepath, 'rb') as f:
+            return (True, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    except FileNotFoundError:
+        return (False, f"File not found: {filepath}")
+    except PermissionError:
+        return (False, f"Permission denied: {filepath}")
+    except Exception as e:
+        return (False, f"Error reading file: {str(e)}")
+
+
+def _read_chunks(f, chunk_size: int):
+    """Yield chunks from an open file, closing it at the end."""
+    with f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
 
 
 def safe_read_csv(filepath: str) -> tuple:
@@ -90,6 +168,190 @@ def safe_write_file(filepath: str, content: str) -> tuple:
     pass
 
 
+class Schema:
+    """
+    Validation rules for CSV rows, compiled once into a single check.
+
+    The required, numeric, range and allowed-value rules are turned into
+    the source of one Python function with every field name written in as
+    a constant (range limits and allowed sets are bound as globals), so
+    checking a row does not walk the rule lists again. Error messages are
+    only built for rows that fail.
+
+    An empty or absent field is reported once: as missing if it is
+    required, otherwise as not numeric if it must be numeric. Range and
+    allowed-value rules are not applied to empty fields.
+
+    Args:
+        required: Fields that must be present and non-empty
+        numeric: Fields that must convert to float
+        ranges: {field: (low, high)} inclusive numeric limits; either may be
+                None. Fields with a range are also numeric.
+        allowed: {field: collection of allowed string values}
+
+    Example:
+        schema = Schema(required=['sample_id'], numeric=['grade'],
+                        ranges={'depth': (0, 1000)},
+                        allowed={'location': {'Site-A', 'Site-B'}})
+        row = {'sample_id': 'GEO-001', 'grade': 'x', 'depth': '50',
+               'location': 'Site-C'}
+        schema.check(row)
+        # [('grade', 'not_numeric'), ('location', 'not_allowed')]
+        schema.validate(row)
+        # (False, ["Field 'grade' is not a valid number",
+        #          "Field 'location' has invalid value 'Site-C'"])
+    """
+
+    def __init__(self, required: list = (), numeric: list = (),
+                 ranges: dict = None, allowed: dict = None):
+        self.required = list(required)
+        self.numeric = list(numeric)
+        self.ranges = dict(ranges or {})
+        self.allowed = {field: frozenset(values) for field, values in (allowed or {}).items()}
+        self.check = self._compile()
+
+    def _compile(self):
+        """Generate and compile the per-row check function."""
+        fields = []
+        for field in self.required + self.numeric + list(self.ranges) + list(self.allowed):
+            if field not in fields:
+                fields.append(field)
+
+        namespace = {}
+        lines = ['def check(row):', '    get = row.get', '    errors = []']
+        for n, field in enumerate(fields):
+            name = repr(field)
+            lines.append(f'    value = get({name})')
+            lines.append('    if value is None or not str(value).strip():')
+            if field in self.required:
+                lines.append(f'        errors.append(({name}, "missing"))')
+            elif field in self.numeric or field in self.ranges:
+                lines.append(f'        errors.append(({name}, "not_numeric"))')
+            else:
+                lines.append('        pass')
+            lines.append('    else:')
+            if field in self.numeric or field in self.ranges:
+                lines.append('        try:')
+                lines.append('            number = float(value)')
+                lines.append('        except (TypeError, ValueError):')
+                lines.append(f'            errors.append(({name}, "not_numeric"))')
+                low, high = self.ranges.get(field, (None, None))
+                conditions = []
+                # Limits go in the namespace: repr() of inf/nan is not valid source
+                if low is not None:
+                    namespace[f'_low_{n}'] = float(low)
+                    conditions.append(f'_low_{n} <= number')
+                if high is not None:
+                    namespace[f'_high_{n}'] = float(high)
+                    conditions.append(f'number <= _high_{n}')
+                if conditions:
+                    lines.append('        else:')
+                    lines.append(f'            if not ({" and ".join(conditions)}):')
+                    lines.append(f'                errors.append(({name}, "out_of_range"))')
+            if field in self.allowed:
+                namespace[f'_allowed_{n}'] = self.allowed[field]
+                lines.append(f'        if value not in _allowed_{n}:')
+                lines.append(f'            errors.append(({name}, "not_allowed"))')
+            if lines[-1] == '    else:':
+                lines.append('        pass')
+        lines.append('    return errors')
+
+        self.source = '\n'.join(lines)
+        exec(compile(self.source, '<Schema.check>', 'exec'), namespace)
+        return namespace['check']
+
+    def __reduce__(self):
+        # The compiled check cannot be pickled; rebuild it from the rules
+        return (Schema, (self.required, self.numeric, self.ranges, self.allowed))
+
+    def rules(self) -> list:
+        """JSON-compatible description of the rules, e.g. to key a checkpoint."""
+        return [self.required, self.numeric,
+                sorted([field, low, high] for field, (low, high) in self.ranges.items()),
+                sorted([field, sorted(values)] for field, values in self.allowed.items())]
+
+    def message(self, row: dict, field: str, kind: str) -> str:
+        """Human-readable message for one (field, kind) error."""
+        if kind == 'missing':
+            return f"Field '{field}' is missing or empty"
+        if kind == 'not_numeric':
+            return f"Field '{field}' is not a valid number"
+        if kind == 'out_of_range':
+            low, high = self.ranges[field]
+            return f"Field '{field}' is out of range [{low}, {high}]"
+        return f"Field '{field}' has invalid value '{row.get(field)}'"
+
+    def messages(self, row: dict, errors: list) -> list:
+        """Messages for all (field, kind) errors of a row."""
+        return [self.message(row, field, kind) for field, kind in errors]
+
+    def validate(self, row: dict) -> tuple:
+        """Check one row; return (is_valid, list of error messages)."""
+        errors = self.check(row)
+        return (not errors, self.messages(row, errors))
+
+    def check_columns(self, columns: dict, row_count: int = None) -> dict:
+        """
+        Check a batch of rows given column by column.
+
+        Numeric fields are converted a whole column at a time with
+        convert_column instead of value by value.
+
+        Args:
+            columns: {field: list of values}, all lists the same length;
+                     fields missing from the dict count as empty
+            row_count: Number of rows in the batch (default: the length of
+                       the longest column)
+
+        Returns:
+            {row_index: [(field, kind), ...]} for the rows that fail only,
+            with the same errors in the same order as check()
+        """
+        if row_count is None:
+            row_count = max((len(values) for values in columns.values()), default=0)
+        errors = {}
+        fields = []
+        for field in self.required + self.numeric + list(self.ranges) + list(self.allowed):
+            if field not in fields:
+                fields.append(field)
+
+        for field in fields:
+            values = columns.get(field, [None] * row_count)
+            if field in self.numeric or field in self.ranges:
+                numbers, ok, _ = convert_column(values)
+                low, high = self.ranges.get(field, (None, None))
+            else:
+                ok = None
+            for i, value in enumerate(values):
+                if value is None or not value.strip():
+                    if field in self.required:
+                        errors.setdefault(i, []).append((field, 'missing'))
+                    elif ok is not None:
+                        errors.setdefault(i, []).append((field, 'not_numeric'))
+                    continue
+                if ok is not None:
+                    if not ok[i]:
+                        errors.setdefault(i, []).append((field, 'not_numeric'))
+                    elif ((low is not None and not low <= numbers[i]) or
+                          (high is not None and not numbers[i] <= high)):
+                        errors.setdefault(i, []).append((field, 'out_of_range'))
+                if field in self.allowed and value not in self.allowed[field]:
+                    errors.setdefault(i, []).append((field, 'not_allowed'))
+        return dict(sorted(errors.items()))
+
+
+SAMPLE_SCHEMA = Schema(
+    required=['sample_id', 'rock_type', 'grade', 'depth'],
+    numeric=['grade', 'depth', 'mass'],
+)
+
+
+@lru_cache(maxsize=32)
+def _cached_schema(required: tuple, numeric: tuple) -> Schema:
+    """Compile each required/numeric combination only once."""
+    return Schema(required, numeric)
+
+
 def validate_csv_row(row: dict, required_fields: list,
                      numeric_fields: list = None) -> tuple:
     """
@@ -98,7 +360,10 @@ def validate_csv_row(row: dict, required_fields: list,
     Args:
         row: Dictionary representing a CSV row
         required_fields: List of field names that must be present and non-empty
-        numeric_fields: List of field names that must be numeric (optional)
+        numeric_fields: List of field names that must be numeric (optional).
+                        An empty or absent numeric field is not a valid
+                        number; if it is also required, only the missing
+                        error is reported.
 
     Returns:
         Tuple of (is_valid: bool, errors: list)
@@ -120,19 +385,164 @@ def validate_csv_row(row: dict, required_fields: list,
         )
         # Returns: (False, ["Field 'sample_id' is missing or empty"])
     """
-    # TODO: Implement this function
-    # Check all required fields are present and non-empty
-    # If numeric_fields provided, check each can be converted to float
-    # Collect all errors and return (is_valid, errors)
-    pass
+    schema = _cached_schema(tuple(required_fields), tuple(numeric_fields or ()))
+    return schema.validate(row)
+
+
+def load_checkpoint(checkpoint_path: str, filepath: str, job: list):
+    """
+    Load a checkpoint saved by save_checkpoint, if it can still be used.
+
+    Args:
+        checkpoint_path: Path to the checkpoint file
+        filepath: Path to the input file the job reads
+        job: JSON-compatible list describing the job, e.g. ['statistics', 'grade']
+
+    Returns:
+        Checkpoint dictionary with 'offset', 'row_number' and 'state', or None
+        if there is no checkpoint, it belongs to another job, or the input
+        file has changed since it was saved
+
+    Example:
+        saved = load_checkpoint('grade.ckpt', 'big.csv', ['statistics', 'grade'])
+        if saved is not None:
+            print(f"Resuming after row {saved['row_number']}")
+    """
+    try:
+        with open(checkpoint_path) as f:
+            checkpoint = json.load(f)
+        fingerprint = file_fingerprint(filepath)
+    except (OSError, ValueError):
+        return None
+    if checkpoint.get('job') != job or checkpoint.get('fingerprint') != fingerprint:
+        return None
+    return checkpoint
+
+
+def save_checkpoint(checkpoint_path: str, filepath: str, job: list,
+                    offset: int, row_number: int, state) -> None:
+    """
+    Save the progress of a job over a file.
+
+    The checkpoint is written to a temporary file and renamed into place,
+    so a crash while saving leaves the previous checkpoint intact.
+
+    Args:
+        checkpoint_path: Path to the checkpoint file
+        filepath: Path to the input file the job reads
+        job: JSON-compatible list describing the job
+        offset: Byte offset where the next unprocessed record starts
+        row_number: Number of rows processed so far
+        state: JSON-compatible partial result of the job
+
+    Example:
+        save_checkpoint('grade.ckpt', 'big.csv', ['statistics', 'grade'],
+                        offset, row_number, {'count': 10, 'sum': 25.1})
+    """
+    checkpoint = {
+        'job': job,
+        'fingerprint': file_fingerprint(filepath),
+        'offset': offset,
+        'row_number': row_number,
+        'state': state,
+    }
+    temp_path = checkpoint_path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(temp_path, checkpoint_path)
+
+
+def iter_checkpointed_records(filepath: str, checkpoint_path: str, job: list,
+                              state: dict, every: int = CHECKPOINT_EVERY_ROWS,
+                              on_save=None):
+    """
+    Yield (row_number, values) for the CSV rows after the last checkpoint.
+
+    state is the caller's partial result. It is restored from a matching
+    checkpoint before the first row is yielded, the caller must update it for
+    each row, and it is saved with the byte offset and row number every
+    `every` rows. The checkpoint file is removed once the whole file is read.
+    The state is saved as [key, value] pairs, so keys such as None (the
+    value of a missing field) come back unchanged; the values must be
+    JSON-compatible.
+
+    Args:
+        filepath: Path to the CSV file
+        checkpoint_path: Path to the checkpoint file
+        job: JSON-compatible list describing the job (see load_checkpoint)
+        state: Dictionary holding the partial result; updated in place.
+               Its keys may be strings, numbers or None
+        every: Save a checkpoint after this many rows
+        on_save: Optional function called with state just before each save,
+                 e.g. to flush output files
+
+    Example:
+        counts = {}
+        for _, values in iter_checkpointed_records('big.csv', 'counts.ckpt',
+                                                   ['counts'], counts):
+            counts[values[1]] = counts.get(values[1], 0) + 1
+    """
+    saved = load_checkpoint(checkpoint_path, filepath, job)
+    start, row_number = None, 0
+    if saved is not None:
+        state.update(saved['state'])
+        start, row_number = saved['offset'], saved['row_number']
+    for _, end, values in iter_records(filepath, start):
+        row_number += 1
+        yield row_number, values
+        if row_number % every == 0:
+            if on_save is not None:
+                on_save(state)
+            save_checkpoint(checkpoint_path, filepath, job, end, row_number,
+                            [[key, value] for key, value in state.items()])
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
 
 
-def process_csv_with_validation(filepath: str) -> dict:
+def process_csv_with_validation(filepath: str, schema: 'Schema' = None,
+                                valid_output: str = None,
+                                quarantine_output: str = None,
+                                max_error_samples: int = 100,
+                                workers: int = None,
+                                chunk_bytes: int = VALIDATION_CHUNK_BYTES,
+                                checkpoint: str = None,
+                                checkpoint_every: int = CHECKPOINT_EVERY_ROWS,
+                                summary: bool = False,
+                                max_examples_per_kind: int = 5) -> dict:
     """
     Process a CSV file, validating each row and reporting errors.
 
     Args:
         filepath: Path to the CSV file
+        schema: Rules to check (default: SAMPLE_SCHEMA, i.e. sample_id,
+                rock_type, grade and depth required; grade, depth and mass
+                numeric)
+        valid_output: If given (streaming mode), write valid rows to this CSV
+                      instead of keeping them in memory
+        quarantine_output: If given (streaming mode), write invalid rows to
+                           this CSV with extra 'row_number' and 'errors'
+                           columns instead of keeping them in memory
+        max_error_samples: In streaming mode, how many invalid rows to keep
+                           as examples in the result
+        workers: If more than 1, split the file into record-aligned chunks of
+                 about chunk_bytes and validate them in a process pool. Row
+                 numbers and row order are the same as a single-process run.
+                 Workers send back only their invalid rows; valid rows are
+                 written to part files next to valid_output (streaming
+                 mode) or re-read by byte range, and at most 2 * workers
+                 chunks are in flight.
+        chunk_bytes: Approximate chunk size for parallel validation
+        checkpoint: If given (streaming mode only), save progress to this
+                    file every checkpoint_every rows. A rerun after a crash
+                    truncates the outputs to their checkpointed sizes and
+                    resumes after the last checkpointed row, as long as the
+                    input file is unchanged. Cannot be combined with workers.
+        checkpoint_every: Rows between checkpoints
+        summary: If True, count errors by field and kind instead of keeping
+                 every invalid row, so memory stays flat on very dirty files
+                 (implies streaming mode; outputs are optional)
+        max_examples_per_kind: In summary mode, how many example rows to keep
+                               for each (field, kind)
 
     Returns:
         Dictionary with:
@@ -140,20 +550,319 @@ def process_csv_with_validation(filepath: str) -> dict:
         - 'invalid_rows': list of tuples (row_number, row, errors)
         - 'error_count': total number of invalid rows
 
+        In streaming mode (valid_output or quarantine_output given), only
+        counters and a bounded sample are returned instead:
+        - 'valid_count': number of valid rows
+        - 'error_count': number of invalid rows
+        - 'error_samples': the first max_error_samples (row_number, row, errors)
+
+        In summary mode, 'error_samples' is replaced by:
+        - 'error_summary': {field: {kind: {'count': N, 'examples': [(row_number, row), ...]}}}
+          where kind is 'missing', 'not_numeric', 'out_of_range' or 'not_allowed'
+
     Example:
         result = process_csv_with_validation('data/samples.csv')
         print(f"Valid: {len(result['valid_rows'])}")
         print(f"Invalid: {result['error_count']}")
         for row_num, row, errors in result['invalid_rows']:
             print(f"Row {row_num}: {errors}")
+
+        result = process_csv_with_validation('big.csv', valid_output='clean.csv',
+                                             quarantine_output='quarantine.csv')
+        # {'valid_count': 9999120, 'error_count': 880, 'error_samples': [...]}
+
+        result = process_csv_with_validation('big.csv', summary=True)
+        result['error_summary']['grade']['not_numeric']['count']  # 412
     """
-    # TODO: Implement this function
-    # Define required fields: ['sample_id', 'rock_type', 'grade', 'depth']
-    # Define numeric fields: ['grade', 'depth', 'mass']
-    # Read CSV and validate each row using validate_csv_row
-    # Track row numbers (1-based, excluding header)
-    # Return summary dictionary
-    pass
+    if schema is None:
+        schema = SAMPLE_SCHEMA
+    streaming = summary or valid_output is not None or quarantine_output is not None
+    examples = max_examples_per_kind if summary else None
+    if checkpoint is not None:
+        if not streaming:
+            raise ValueError("checkpoint requires valid_output, quarantine_output "
+                             "or summary=True")
+        if workers and workers > 1:
+            raise ValueError("checkpoint cannot be combined with workers > 1")
+        return _stream_validation(filepath, schema, workers, chunk_bytes, valid_output,
+                                  quarantine_output, max_error_samples, examples,
+                                  checkpoint, checkpoint_every)
+    if streaming:
+        return _stream_validation(filepath, schema, workers, chunk_bytes, valid_output,
+                                  quarantine_output, max_error_samples, examples)
+
+    header, _ = read_header_with_offset(filepath)
+    valid_rows = []
+    invalid_rows = []
+    for rows_before, _, rows, invalid, _ in _validation_batches(filepath, schema, workers,
+                                                                 chunk_bytes):
+        for i, values in enumerate(rows):
+            row = _row_dict(header, values)
+            if i in invalid:
+                # Row numbers are 1-based and exclude the header
+                invalid_rows.append((rows_before + i + 1, row,
+                                     schema.messages(row, invalid[i][1])))
+            else:
+                valid_rows.append(row)
+    return {
+        'valid_rows': valid_rows,
+        'invalid_rows': invalid_rows,
+        'error_count': len(invalid_rows),
+    }
+
+
+def _row_dict(header: list, values: list) -> dict:
+    """Build a row dictionary the same way csv.DictReader does."""
+    row = dict(zip(header, values))
+    if len(values) < len(header):
+        for column in header[len(values):]:
+            row[column] = None
+    elif len(values) > len(header):
+        row[None] = values[len(header):]
+    return row
+
+
+def _padded(values: list, width: int) -> list:
+    """Fit a row to the header width the way csv.DictWriter writes it."""
+    if len(values) >= width:
+        return values[:width]
+    return values + [''] * (width - len(values))
+
+
+def _batches(rows, size: int):
+    """Yield lists of up to size items from an iterable."""
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _check_batch(schema: 'Schema', header: list, batch: list) -> dict:
+    """Check a list of value lists; returns {batch_index: errors} for failing rows."""
+    # Like DictReader, a repeated header name takes the last column
+    positions = {field: index for index, field in enumerate(header)}
+    columns = {}
+    for field in schema.required + schema.numeric + list(schema.ranges) + list(schema.allowed):
+        index = positions.get(field)
+        if index is not None and field not in columns:
+            columns[field] = [values[index] if index < len(values) else None
+                              for values in batch]
+    return schema.check_columns(columns, len(batch))
+
+
+def _validate_chunk(filepath: str, start: int, end: int, header: list,
+                    schema: 'Schema', part_dir: str = None) -> tuple:
+    """
+    Validate one byte range of a file in a worker process.
+
+    Only the invalid rows are sent back. If part_dir is given, the valid
+    rows are written to a temporary CSV part file there (no header), so the
+    parent can append it to the valid output without parsing it again.
+
+    Returns:
+        Tuple of (row_count, invalid, part_path) where invalid maps the
+        0-based index of each invalid row in the chunk to (values, errors)
+    """
+    invalid = {}
+    row_count = 0
+    part_path = out = writer = None
+    if part_dir is not None:
+        fd, part_path = tempfile.mkstemp(suffix='.part', dir=part_dir)
+        out = open(fd, 'w', newline='')
+        writer = csv.writer(out)
+    width = len(header)
+    try:
+        for batch in _batches(iter_rows(filepath, start, end), VALIDATION_BATCH_ROWS):
+            errors = _check_batch(schema, header, batch)
+            for i, row_errors in errors.items():
+                invalid[row_count + i] = (batch[i], row_errors)
+            if writer is not None:
+                writer.writerows(_padded(values, width)
+                                 for i, values in enumerate(batch) if i not in errors)
+            row_count += len(batch)
+    finally:
+        if out is not None:
+            out.close()
+    return row_count, invalid, part_path
+
+
+def _validation_batches(filepath: str, schema: 'Schema', workers: int,
+                        chunk_bytes: int, part_dir: str = None, reread: bool = True):
+    """
+    Validate a file and yield the results batch by batch, in file order.
+
+    Yields tuples of (rows_before, row_count, rows, invalid, part_path):
+    rows_before is the number of data rows in earlier batches, rows the
+    batch's value lists, and invalid maps the batch index of each invalid
+    row to (values, errors). With workers > 1 every chunk of the file is a
+    batch and at most 2 * workers chunks are in flight. Then, if part_dir
+    is given, the valid rows are in the CSV part file part_path (the
+    caller removes it) and rows is None; otherwise the parent re-reads the
+    chunk's byte range to get rows, unless reread is False.
+    """
+    header, _ = read_header_with_offset(filepath)
+    if not workers or workers <= 1:
+        rows_before = 0
+        for batch in _batches(iter_rows(filepath), VALIDATION_BATCH_ROWS):
+            errors = _check_batch(schema, header, batch)
+            yield (rows_before, len(batch), batch,
+                   {i: (batch[i], row_errors) for i, row_errors in errors.items()}, None)
+            rows_before += len(batch)
+        return
+
+    chunks = iter(split_record_chunks(filepath, chunk_bytes))
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        def submit(count):
+            for start, end in itertools.islice(chunks, count):
+                pending.append((start, end, pool.submit(
+                    _validate_chunk, filepath, start, end, header, schema, part_dir)))
+
+        submit(2 * workers)
+        rows_before = 0
+        try:
+            while pending:
+                start, end, future = pending.popleft()
+                row_count, invalid, part_path = future.result()
+                submit(1)
+                rows = (list(iter_rows(filepath, start, end))
+                        if reread and part_dir is None else None)
+                yield rows_before, row_count, rows, invalid, part_path
+                rows_before += row_count
+        finally:
+            # Stop early (error or abandoned generator): drop unread part files
+            for _, _, future in pending:
+                future.cancel()
+            for _, _, future in pending:
+                if not future.cancelled() and future.exception() is None:
+                    part_path = future.result()[2]
+                    if part_path is not None and os.path.exists(part_path):
+                        os.remove(part_path)
+
+
+def _checkpointed_batches(filepath: str, schema: 'Schema', checkpoint: str, job: list,
+                          state: dict, every: int, on_save):
+    """Checkpointed validation: one row per batch, so the state is saved row-exactly."""
+    header, _ = read_header_with_offset(filepath)
+    check = schema.check
+    for row_number, values in iter_checkpointed_records(filepath, checkpoint, job,
+                                                        state, every, on_save):
+        errors = check(_row_dict(header, values))
+        yield row_number - 1, 1, [values], {0: (values, errors)} if errors else {}, None
+
+
+def _stream_validation(filepath: str, schema: 'Schema', workers: int, chunk_bytes: int,
+                       valid_output: str, quarantine_output: str, max_error_samples: int,
+                       max_examples_per_kind: int = None, checkpoint: str = None,
+                       checkpoint_every: int = CHECKPOINT_EVERY_ROWS) -> dict:
+    """
+    Streaming mode of process_csv_with_validation: write rows as they go.
+
+    With max_examples_per_kind set (summary mode), errors are counted per
+    field and kind in 'error_summary' instead of sampled in 'error_samples'.
+    """
+    summary = max_examples_per_kind is not None
+    result = {'valid_count': 0, 'error_count': 0, 'sizes': {}}
+    if summary:
+        result['error_summary'] = {}
+    else:
+        result['error_samples'] = []
+    header, _ = read_header_with_offset(filepath)
+    width = len(header)
+    outputs = {name: path for name, path in
+               (('valid', valid_output), ('quarantine', quarantine_output))
+               if path is not None}
+    # Limits and allowed sets are not in schema.source, so key by the rules
+    job = ['validation', schema.rules(), valid_output, quarantine_output]
+    saved = load_checkpoint(checkpoint, filepath, job) if checkpoint else None
+    saved_sizes = dict(saved['state'])['sizes'] if saved is not None else None
+    if saved is not None and any(
+            not os.path.exists(path) or os.path.getsize(path) < saved_sizes[name]
+            for name, path in outputs.items()):
+        # The outputs no longer hold what the checkpoint recorded; start over
+        os.remove(checkpoint)
+        saved = None
+
+    with ExitStack() as stack:
+        files = {}
+        for name, path in outputs.items():
+            if saved is not None:
+                # Drop rows written after the checkpoint; they will be redone
+                os.truncate(path, saved_sizes[name])
+                files[name] = stack.enter_context(open(path, 'a', newline=''))
+            else:
+                files[name] = stack.enter_context(open(path, 'w', newline=''))
+        valid_writer = quarantine_writer = None
+        if 'valid' in files:
+            valid_writer = csv.writer(files['valid'])
+        if 'quarantine' in files:
+            quarantine_writer = csv.DictWriter(
+                files['quarantine'], fieldnames=['row_number'] + header + ['errors'],
+                extrasaction='ignore')
+        if saved is None:
+            if valid_writer is not None:
+                valid_writer.writerow(header)
+            if quarantine_writer is not None:
+                quarantine_writer.writeheader()
+
+        if checkpoint is not None:
+            def record_sizes(state):
+                for name, out in files.items():
+                    out.flush()
+                    state['sizes'][name] = os.fstat(out.fileno()).st_size
+
+            record_sizes(result)
+            batches = _checkpointed_batches(filepath, schema, checkpoint, job, result,
+                                            checkpoint_every, record_sizes)
+        else:
+            # Workers write their chunk's valid rows next to the valid output
+            part_dir = (os.path.dirname(os.path.abspath(valid_output))
+                        if valid_output is not None else None)
+            batches = _validation_batches(filepath, schema, workers, chunk_bytes,
+                                          part_dir, reread=False)
+
+        for rows_before, row_count, rows, invalid, part_path in batches:
+            result['valid_count'] += row_count - len(invalid)
+            if part_path is not None:
+                out = files['valid']
+                out.flush()
+                with open(part_path, newline='') as part:
+                    shutil.copyfileobj(part, out)
+                os.remove(part_path)
+            elif valid_writer is not None:
+                valid_writer.writerows(_padded(values, width)
+                                       for i, values in enumerate(rows) if i not in invalid)
+
+            for i, (values, errors) in sorted(invalid.items()):
+                row_number = rows_before + i + 1
+                row = _row_dict(header, values)
+                result['error_count'] += 1
+                if quarantine_writer is not None:
+                    messages = schema.messages(row, errors)
+                    quarantine_writer.writerow(
+                        dict(row, row_number=row_number, errors='; '.join(messages)))
+                if summary:
+                    for field, kind in errors:
+                        counts = result['error_summary'].setdefault(field, {}).setdefault(
+                            kind, {'count': 0, 'examples': []})
+                        counts['count'] += 1
+                        if len(counts['examples']) < max_examples_per_kind:
+                            counts['examples'].append((row_number, row))
+                elif len(result['error_samples']) < max_error_samples:
+                    result['error_samples'].append(
+                        (row_number, row, schema.messages(row, errors)))
+
+    del result['sizes']
+    # Samples restored from a checkpoint come back from JSON as lists
+    if summary:
+        for kinds in result['error_summary'].values():
+            for counts in kinds.values():
+                counts['examples'] = [tuple(example) for example in counts['examples']]
+    else:
+        result['error_samples'] = [tuple(sample) for sample in result['error_samples']]
+    return result
 
 
 def safe_convert_numeric(value: str, default=None):
@@ -172,10 +881,70 @@ def safe_convert_numeric(value: str, default=None):
         grade = safe_convert_numeric('N/A', default=0.0)  # Returns 0.0
         grade = safe_convert_numeric('')  # Returns None
     """
-    # TODO: Implement this function
-    # Try to convert value to float
-    # Return default if conversion fails
-    pass
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def convert_column(values: list, default=None, kind: str = 'float') -> tuple:
+    """
+    Convert a whole column of strings to numbers in one call.
+
+    Repeated strings are converted only once, and values that cannot be
+    converted are counted by the kind of failure.
+
+    Args:
+        values: List of strings (None is treated as empty)
+        default: Number stored where conversion fails
+                 (default: NaN for 'float', 0 for 'int')
+        kind: 'float' (result is array('d')) or 'int' (result is array('q'))
+
+    Returns:
+        Tuple of (numbers: array, ok: bytearray, failures: dict) where
+        ok[i] is 1 if values[i] converted, and failures counts
+        {'empty': n, 'invalid': n}
+
+    Example:
+        numbers, ok, failures = convert_column(['2.5', 'N/A', '', '2.5'])
+        # array('d', [2.5, nan, nan, 2.5]), bytearray(b'\\x01\\x00\\x00\\x01'),
+        # {'empty': 1, 'invalid': 1}
+    """
+    if kind == 'float':
+        numbers = array('d')
+        parse = float
+        fill = float('nan') if default is None else float(default)
+    elif kind == 'int':
+        numbers = array('q')
+        parse = int
+        fill = 0 if default is None else int(default)
+    else:
+        raise ValueError(f"Unknown kind: {kind}")
+
+    ok = bytearray(len(values))
+    failures = {'empty': 0, 'invalid': 0}
+    cache = {}  # string -> number, or the failure kind
+    append = numbers.append
+    for i, value in enumerate(values):
+        result = cache.get(value)
+        if result is None:
+            if value is None or not value.strip():
+                result = 'empty'
+            else:
+                try:
+                    result = parse(value)
+                    if kind == 'int' and not -2 ** 63 <= result < 2 ** 63:
+                        result = 'invalid'  # does not fit array('q')
+                except ValueError:
+                    result = 'invalid'
+            cache[value] = result
+        if result.__class__ is str:
+            failures[result] += 1
+            append(fill)
+        else:
+            ok[i] = 1
+            append(result)
+    return numbers, ok, failures
 
 
 def check_file_exists(filepath: str) -> bool:
@@ -198,6 +967,9 @@ def get_file_info(filepath: str) -> dict:
     """
     Get information about a file.
 
+    Lines are counted by counting b'\\n' in binary blocks, so the file is
+    never decoded; a last line without a trailing newline still counts.
+
     Args:
         filepath: Path to the file
 
@@ -207,11 +979,73 @@ def get_file_info(filepath: str) -> dict:
         - If file doesn't exist: {'exists': False, 'error': 'File not found'}
         - If permission denied: {'exists': True, 'readable': False, 'error': 'Permission denied'}
     """
-    # TODO: Implement this function
-    # Check if file exists and can be read
-    # Count lines if readable
-    # Return appropriate dictionary
-    pass
+    try:
+        line_count = 0
+        last_block = b''
+        with open(filepath, 'rb') as f:
+            while True:
+                block = f.read(LINE_COUNT_BLOCK_BYTES)
+                if not block:
+                    break
+                line_count += block.count(b'\n')
+                last_block = block
+        if last_block and not last_block.endswith(b'\n'):
+            line_count += 1
+    except FileNotFoundError:
+        return {'exists': False, 'error': 'File not found'}
+    except PermissionError:
+        return {'exists': True, 'readable': False, 'error': 'Permission denied'}
+    except OSError as e:
+        return {'exists': True, 'readable': False, 'error': str(e)}
+    return {'exists': True, 'readable': True, 'line_count': line_count}
+
+
+# (inode, size, mtime_ns) -> get_file_info result, oldest first
+_file_info_cache = {}
+
+
+def get_directory_file_info(directory: str, max_workers: int = None) -> dict:
+    """
+    Get information about every file in a directory.
+
+    Files are listed with os.scandir and counted concurrently in a thread
+    pool. Results for readable files are cached on (inode, size, mtime_ns),
+    so files that have not changed since an earlier call are answered from
+    their stat alone without being opened.
+
+    Args:
+        directory: Directory to scan (subdirectories are not entered)
+        max_workers: Threads used to count lines (default: ThreadPoolExecutor's)
+
+    Returns:
+        Dictionary mapping each file's path to its get_file_info dictionary
+
+    Example:
+        info = get_directory_file_info('incoming/')
+        # {'incoming/a.csv': {'exists': True, 'readable': True, 'line_count': 51}, ...}
+    """
+    results = {}
+    misses = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            stat = entry.stat()
+            key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+            if key in _file_info_cache:
+                results[entry.path] = dict(_file_info_cache[key])
+            else:
+                misses[entry.path] = key
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        for path, info in zip(misses, pool.map(get_file_info, misses)):
+            results[path] = info
+            # Errors are not cached: a chmod does not change the mtime
+            if info.get('readable'):
+                _file_info_cache[misses[path]] = dict(info)
+                if len(_file_info_cache) > FILE_INFO_CACHE_SIZE:
+                    del _file_info_cache[next(iter(_file_info_cache))]
+    return dict(sorted(results.items()))
 
 
 # =============================================================================
@@ -8,14 +8,193 @@ Learning Outcomes:
 - LO4.4: Use context managers (with statement) for file operations
 """
 
+import glob
+import gzip
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-def write_sample_log(filepath: str, samples: list) -> int:
+# SampleLogWriter flushes once this many bytes are buffered
+LOG_BUFFER_BYTES = 64 * 1024
+
+# ... or once this many seconds have passed since the last flush
+LOG_FLUSH_INTERVAL = 1.0
+
+# tail_lines reads backwards from the end of the file in blocks of this size
+TAIL_BLOCK_BYTES = 8192
+
+
+class SampleLogWriter:
+    """
+    Buffered log writer that keeps its file open and rotates it.
+
+    Lines are collected in memory and written when buffer_bytes are buffered
+    or flush_interval seconds have passed since the last flush, and always
+    on flush() and close(). The interval is enforced by the background
+    thread too, so a buffered line reaches the file even if no further
+    lines are written. When the file would grow past max_bytes or
+    max_lines, it is renamed to filepath + '.N' (N counts up, so higher is
+    newer) and a new file is started. With compress=True, rotated segments
+    are gzipped to filepath + '.N.gz' in the background thread. Only the
+    newest backup_count segments are kept. The writer can be shared
+    between threads.
+
+    Example:
+        with SampleLogWriter('survey.log', max_bytes=10 * 1024 * 1024) as log:
+            for sample in samples:
+                log.write_line(f"Sample {sample['id']}: {sample['rock_type']}")
+    """
+
+    def __init__(self, filepath: str, buffer_bytes: int = LOG_BUFFER_BYTES,
+                 flush_interval: float = LOG_FLUSH_INTERVAL, max_bytes: int = None,
+                 max_lines: int = None, backup_count: int = 5, compress: bool = True):
+        self.filepath = filepath
+        self.buffer_bytes = buffer_bytes
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.max_lines = max_lines
+        self.backup_count = backup_count
+        self.compress = compress
+        self._buffer = []
+        self._buffered = 0
+        self._last_flush = time.monotonic()
+        # One background thread compresses and prunes segments in order,
+        # and runs the timed flush of lines that are still buffered
+        self._background = ThreadPoolExecutor(max_workers=1)
+        self._pending = []
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._timed_flush = None
+        self._segment = max(self._segments(), default=(0, None))[0]
+        self._open()
+
+    def _open(self) -> None:
+        self._file = open(self.filepath, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+        self._lines = 0
+        if self.max_lines is not None and self._size:
+            with open(self.filepath, 'rb') as f:
+                self._lines = sum(block.count(b'\n')
+                                  for block in iter(lambda: f.read(LOG_BUFFER_BYTES), b''))
+
+    def _segments(self) -> list:
+        """Rotated segments as sorted (number, path) pairs."""
+        segments = []
+        for path in glob.glob(glob.escape(self.filepath) + '.*'):
+            number = path[len(self.filepath) + 1:].split('.')[0]
+            if number.isdigit():
+                segments.append((int(number), path))
+        return sorted(segments)
+
+    def write_line(self, line: str) -> None:
+        """Buffer one line; a newline is added."""
+        data = line + '\n'
+        size = len(data.encode('utf-8'))
+        with self._lock:
+            if self._size and (
+                    (self.max_bytes is not None and self._size + size > self.max_bytes)
+                    or (self.max_lines is not None and self._lines >= self.max_lines)):
+                self.rotate()
+            self._buffer.append(data)
+            self._buffered += size
+            self._size += size
+            self._lines += 1
+            if (self._buffered >= self.buffer_bytes
+                    or time.monotonic() - self._last_flush >= self.flush_interval):
+                self.flush()
+            elif self._timed_flush is None:
+                self._timed_flush = self._background.submit(self._flush_when_due)
+
+    def _flush_when_due(self) -> None:
+        """Background task: flush once flush_interval has passed since the last flush."""
+        with self._lock:
+            delay = self._last_flush + self.flush_interval - time.monotonic()
+        # rotate() and close() wake it early so queued work is not held up
+        self._wake.wait(max(delay, 0))
+        with self._lock:
+            self._timed_flush = None
+            if not self._file.closed:
+                self._wake.clear()
+                if self._buffer:
+                    self.flush()
+
+    def flush(self) -> None:
+        """Write buffered lines to the file."""
+        with self._lock:
+            if self._buffer:
+                self._file.write(''.join(self._buffer))
+                self._buffer = []
+                self._buffered = 0
+            self._file.flush()
+            self._last_flush = time.monotonic()
+
+    def rotate(self) -> None:
+        """Close the current file, move it to the next segment and start a new one."""
+        with self._lock:
+            self.flush()
+            self._file.close()
+            self._segment += 1
+            segment_path = f"{self.filepath}.{self._segment}"
+            os.replace(self.filepath, segment_path)
+            self._pending = [future for future in self._pending if not future.done()]
+            if self._timed_flush is not None:
+                self._wake.set()
+            if self.compress:
+                self._pending.append(self._background.submit(self._compress, segment_path))
+            self._pending.append(self._background.submit(self._prune))
+            self._open()
+
+    @staticmethod
+    def _compress(segment_path: str) -> None:
+        temp_path = segment_path + '.gz.tmp'
+        with open(segment_path, 'rb') as src, gzip.open(temp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(temp_path, segment_path + '.gz')
+        os.remove(segment_path)
+
+    def _prune(self) -> None:
+        for _, path in self._segments()[:-self.backup_count or None]:
+            os.remove(path)
+
+    def close(self) -> None:
+        """Flush, close the file and wait for background compression to finish."""
+        self._wake.set()
+        with self._lock:
+            if self._file.closed:
+                return
+            self.flush()
+            self._file.close()
+        self._background.shutdown(wait=True)
+        for future in self._pending:
+            future.result()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def _check_writer(writer: SampleLogWriter, filepath: str) -> None:
+    """Make sure a writer passed to a log function writes to filepath."""
+    if os.path.abspath(writer.filepath) != os.path.abspath(filepath):
+        raise ValueError(f"writer writes to {writer.filepath}, not {filepath}")
+
+
+def write_sample_log(filepath: str, samples: list,
+                     writer: SampleLogWriter = None) -> int:
     """
     Write sample information to a log file.
 
     Args:
         filepath: Path to the output file
         samples: List of sample dictionaries with 'id', 'rock_type', 'grade'
+        writer: Optional open SampleLogWriter for filepath. The lines are
+                then appended through it (buffered, with rotation) instead
+                of rewriting the file.
 
     Returns:
         Number of lines written
@@ -32,13 +211,19 @@ def write_sample_log(filepath: str, samples: list) -> int:
         # Sample GEO-001: Granite, Grade: 2.5%
         # Sample GEO-002: Basalt, Grade: 1.8%
     """
-    # TODO: Implement this function
-    # Use 'with' statement to open file for writing ('w' mode)
-    # Write header line: "Sample Log - Geological Survey"
-    # Write separator line: "=" * 40
-    # For each sample, write: "Sample {id}: {rock_type}, Grade: {grade}%"
-    # Return total number of lines written (header + separator + samples)
-    pass
+    lines = ["Sample Log - Geological Survey", "=" * 40]
+    lines.extend(f"Sample {sample['id']}: {sample['rock_type']}, Grade: {sample['grade']}%"
+                 for sample in samples)
+    if writer is not None:
+        _check_writer(writer, filepath)
+        for line in lines:
+            writer.write_line(line)
+        return len(lines)
+
+    with open(filepath, 'w') as f:
+        for line in lines:
+            f.write(line + '\n')
+    return len(lines)
 
 
 def read_sample_log(filepath: str) -> list:
@@ -55,21 +240,143 @@ def read_sample_log(filepath: str) -> list:
         lines = read_sample_log('output.txt')
         # Returns ['Sample GEO-001: Granite, Grade: 2.5%', ...]
     """
-    # TODO: Implement this function
-    # Use 'with' statement to open file for reading ('r' mode)
-    # Read all lines using readlines() or iterate through file
-    # Skip header (first 2 lines)
-    # Return list of sample lines (stripped of whitespace)
-    pass
+    with open(filepath) as f:
+        lines = f.readlines()
+    # Skip the header and separator lines
+    return [line.strip() for line in lines[2:]]
+
 
+def _decode_line(line: bytes) -> str:
+    """Decode one log line read in binary mode, without its line ending."""
+    return line.rstrip(b'\r').decode('utf-8', errors='replace')
 
-def append_to_log(filepath: str, message: str) -> None:
+
+def follow_log(filepath: str, state: dict = None) -> tuple:
+    """
+    Read the lines appended to a log since the previous call.
+
+    The returned state remembers the byte offset after the last complete
+    line and the file's inode. A trailing line without its newline yet is
+    not returned; it is read again once it is complete. If the file was
+    rotated (the path now points to a different inode), the rest of the
+    old file is read first when it can still be found as an uncompressed
+    filepath + '.N' segment (as SampleLogWriter.rotate() leaves it until
+    it is compressed), then reading starts at the beginning of the current
+    file. Lines appended to the old file before a rotation are lost if that
+    segment was already compressed, renamed elsewhere or deleted, and when
+    the file was truncated in place (it is shorter than the offset).
+
+    Args:
+        filepath: Path to the log file
+        state: State returned by the previous call (default: read from the
+               start of the file)
+
+    Returns:
+        Tuple of (new_lines, state). new_lines are strings without line
+        endings; state is a small JSON-compatible dictionary to pass to the
+        next call. If the file does not exist (e.g. mid-rotation), no lines
+        are returned and the state is unchanged.
+
+    Example:
+        lines, state = follow_log('survey.log')
+        while True:
+            time.sleep(1)
+            lines, state = follow_log('survey.log', state)
+            for line in lines:
+                print(line)
+    """
+    state = dict(state) if state else {'offset': 0, 'inode': None}
+    try:
+        f = open(filepath, 'rb')
+    except FileNotFoundError:
+        return [], state
+    lines = []
+    with f:
+        stat = os.fstat(f.fileno())
+        if stat.st_ino != state['inode'] and state['inode'] is not None:
+            lines = _drain_rotated(filepath, state)
+        if stat.st_ino != state['inode'] or stat.st_size < state['offset']:
+            state = {'offset': 0, 'inode': stat.st_ino}
+        f.seek(state['offset'])
+        data = f.read()
+    complete = data.rfind(b'\n') + 1
+    state['offset'] += complete
+    lines.extend(_decode_line(line) for line in data[:complete].split(b'\n')[:-1])
+    return lines, state
+
+
+def _drain_rotated(filepath: str, state: dict) -> list:
+    """Lines after state['offset'] in the rotated segment with state's inode, if any."""
+    for path in glob.glob(glob.escape(filepath) + '.*'):
+        if not path[len(filepath) + 1:].isdigit():
+            continue  # compressed or temporary files have new inodes
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_ino != state['inode']:
+                    continue
+                f.seek(state['offset'])
+                data = f.read()
+        except FileNotFoundError:
+            continue  # compressed and removed meanwhile
+        # The segment is finished, so a last line without newline is complete
+        if data.endswith(b'\n'):
+            data = data[:-1]
+        return [_decode_line(line) for line in data.split(b'\n')] if data else []
+    return []
+
+
+def tail_lines(filepath: str, n: int) -> list:
+    """
+    Read the last n lines of a file.
+
+    The file is read backwards from the end in blocks of TAIL_BLOCK_BYTES
+    until enough lines are found, so the cost depends on n, not on the
+    size of the file.
+
+    Args:
+        filepath: Path to the file
+        n: Number of lines to return
+
+    Returns:
+        List of up to n lines (without line endings), oldest first
+
+    Example:
+        tail_lines('survey.log', 2)
+        # ['Sample GEO-049: Basalt, Grade: 1.2%', 'Sample GEO-050: Granite, Grade: 3.4%']
+    """
+    if n <= 0:
+        return []
+    blocks = []
+    newlines = 0
+    with open(filepath, 'rb') as f:
+        position = f.seek(0, os.SEEK_END)
+        # n lines need n + 1 newlines: one before the first line and the
+        # file's final newline (one extra block is read if there is none)
+        while position > 0 and newlines <= n:
+            size = min(TAIL_BLOCK_BYTES, position)
+            position -= size
+            f.seek(position)
+            block = f.read(size)
+            newlines += block.count(b'\n')
+            blocks.append(block)
+    lines = b''.join(reversed(blocks)).split(b'\n')
+    if lines[-1] == b'':
+        lines.pop()
+    return [_decode_line(line) for line in lines[-n:]]
+
+
+def append_to_log(filepath: str, message: str,
+                  writer: SampleLogWriter = None) -> None:
     """
     Append a message to an existing log file.
 
+    Opening the file for every message is slow when logging a lot; pass a
+    SampleLogWriter to keep the file open and buffer the writes.
+
     Args:
         filepath: Path to the log file
         message: Message to append
+        writer: Optional open SampleLogWriter for filepath to write through
 
     Returns:
         None
@@ -77,10 +384,13 @@ def append_to_log(filepath: str, message: str) -> None:
     Example:
         append_to_log('output.txt', 'Processing complete.')
     """
-    # TODO: Implement this function
-    # Use 'with' statement to open file in append mode ('a')
-    # Write message followed by newline ('\n')
-    pass
+    if writer is not None:
+        _check_writer(writer, filepath)
+        writer.write_line(message)
+        return
+
+    with open(filepath, 'a') as f:
+        f.write(message + '\n')
 
 
 def count_lines(filepath: str) -> int:
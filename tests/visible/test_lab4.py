@@ -76,6 +76,22 @@ def small_csv(tmp_path):
     return str(csv_path)
 
 
+@pytest.fixture
+def depth_ordered_csv(tmp_path):
+    """Create a larger CSV file whose rows are ordered by depth."""
+    csv_path = tmp_path / "depth_ordered.csv"
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["sample_id", "rock_type", "grade", "depth", "mass", "location"])
+        for i in range(100):
+            writer.writerow([
+                f"GEO-{i + 1:03d}", ["Granite", "Basalt", "Schist"][i % 3],
+                f"{(i * 7) % 50 / 10:.1f}", str(50 + i * 5), "12.0",
+                ["Site-A", "Site-B"][i % 2],
+            ])
+    return str(csv_path)
+
+
 # ========================================================================
 # Task 1: Text File I/O
 # ========================================================================
@@ -125,6 +141,80 @@ class TestTask1TextIO:
         result = read_sample_log(output_path)
         assert isinstance(result, list), "read_sample_log must return a list"
 
+    def test_follow_log_returns_only_new_complete_lines(self, tmp_dir):
+        """follow_log should resume from its offset and survive truncation and rotation."""
+        from lab4_text_io import follow_log
+
+        log_path = str(tmp_dir / "survey.log")
+        with open(log_path, "w") as f:
+            f.write("line 1\nline 2\npart")
+        lines, state = follow_log(log_path)
+        assert lines == ["line 1", "line 2"]
+
+        with open(log_path, "a") as f:
+            f.write("ial\nline 4\n")
+        lines, state = follow_log(log_path, state)
+        assert lines == ["partial", "line 4"]
+        assert follow_log(log_path, state) == ([], state)
+
+        with open(log_path, "w") as f:
+            f.write("new 1\n")
+        lines, state = follow_log(log_path, state)
+        assert lines == ["new 1"]
+
+        # Lines written just before the rotation are drained from the segment
+        with open(log_path, "a") as f:
+            f.write("new 2\nlast")
+        os.replace(log_path, log_path + ".1")
+        with open(log_path, "w") as f:
+            f.write("rotated 1\nrotated 2\n")
+        lines, state = follow_log(log_path, state)
+        assert lines == ["new 2", "last", "rotated 1", "rotated 2"]
+
+        # Once the segment is gone (e.g. compressed), those lines are lost
+        with open(log_path, "a") as f:
+            f.write("rotated 3\n")
+        os.replace(log_path, log_path + ".2")
+        os.remove(log_path + ".2")
+        with open(log_path, "w") as f:
+            f.write("fresh 1\n")
+        lines, state = follow_log(log_path, state)
+        assert lines == ["fresh 1"]
+
+    def test_follow_log_across_writer_rotation(self, tmp_dir):
+        """follow_log should not lose lines when SampleLogWriter rotates."""
+        from lab4_text_io import SampleLogWriter, follow_log
+
+        log_path = str(tmp_dir / "survey.log")
+        seen = []
+        with SampleLogWriter(log_path, flush_interval=0, max_lines=3,
+                             compress=False) as writer:
+            _, state = follow_log(log_path)
+            for i in range(1, 11):
+                writer.write_line(f"line {i}")
+                if i % 4 == 0:
+                    lines, state = follow_log(log_path, state)
+                    seen.extend(lines)
+        lines, state = follow_log(log_path, state)
+        seen.extend(lines)
+        assert seen == [f"line {i}" for i in range(1, 11)]
+
+    def test_tail_lines_reads_backwards(self, tmp_dir, monkeypatch):
+        """tail_lines should return the last n lines across block boundaries."""
+        import lab4_text_io
+        from lab4_text_io import tail_lines
+
+        monkeypatch.setattr(lab4_text_io, "TAIL_BLOCK_BYTES", 7)
+        log_path = str(tmp_dir / "survey.log")
+        lines = [f"Sample GEO-{i:03d}" for i in range(1, 51)]
+        with open(log_path, "w") as f:
+            f.write("\n".join(lines) + "\n")
+        assert tail_lines(log_path, 3) == lines[-3:]
+        assert tail_lines(log_path, 100) == lines
+        with open(log_path, "a") as f:
+            f.write("no newline")
+        assert tail_lines(log_path, 2) == [lines[-1], "no newline"]
+
     def test_count_lines_returns_int(self, tmp_dir, sample_log_data):
         """count_lines should return an integer."""
         from lab4_text_io import write_sample_log, count_lines
@@ -154,6 +244,54 @@ class TestTask1TextIO:
             content = f.read()
         assert "End of Log" in content, "Appended message should appear in file"
 
+    def test_sample_log_writer_buffers_and_rotates(self, tmp_dir):
+        """SampleLogWriter should buffer lines, rotate by line count and gzip segments."""
+        import gzip
+        from lab4_text_io import SampleLogWriter, append_to_log
+
+        log_path = str(tmp_dir / "survey.log")
+        with SampleLogWriter(log_path, flush_interval=3600, max_lines=3,
+                             backup_count=2) as writer:
+            append_to_log(log_path, "line 1", writer=writer)
+            assert os.path.getsize(log_path) == 0, "Lines should stay buffered"
+            for i in range(2, 11):
+                append_to_log(log_path, f"line {i}", writer=writer)
+
+        assert sorted(os.listdir(tmp_dir)) == ["survey.log", "survey.log.2.gz",
+                                               "survey.log.3.gz"]
+        with gzip.open(log_path + ".3.gz", "rt") as f:
+            assert f.read() == "line 7\nline 8\nline 9\n"
+        with open(log_path) as f:
+            assert f.read() == "line 10\n"
+
+    def test_sample_log_writer_flushes_after_interval(self, tmp_dir):
+        """A buffered line should reach the file within flush_interval without more writes."""
+        import time
+        from lab4_text_io import SampleLogWriter
+
+        log_path = str(tmp_dir / "survey.log")
+        with SampleLogWriter(log_path, flush_interval=0.05) as writer:
+            writer.write_line("line 1")
+            deadline = time.monotonic() + 5
+            while os.path.getsize(log_path) == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            with open(log_path) as f:
+                assert f.read() == "line 1\n"
+
+    def test_write_sample_log_through_writer(self, tmp_dir, sample_log_data):
+        """write_sample_log should append through a SampleLogWriter for its file."""
+        from lab4_text_io import SampleLogWriter, write_sample_log
+
+        log_path = str(tmp_dir / "test_log.txt")
+        expected = str(tmp_dir / "expected.txt")
+        count = write_sample_log(expected, sample_log_data)
+        with SampleLogWriter(log_path) as writer:
+            assert write_sample_log(log_path, sample_log_data, writer=writer) == count
+            with pytest.raises(ValueError):
+                write_sample_log(expected, sample_log_data, writer=writer)
+        with open(log_path) as f, open(expected) as g:
+            assert f.read() == g.read()
+
     def test_read_file_content_returns_string(self, tmp_dir, sample_log_data):
         """read_file_content should return the entire file as a string."""
         from lab4_text_io import write_sample_log, read_file_content
@@ -268,6 +406,99 @@ class TestTask2CSVReader:
         assert "sample_id" in result, "Should contain 'sample_id'"
         assert len(result) == 6, "Should have 6 columns"
 
+    def test_iter_records_offsets_with_multiline_fields(self, tmp_dir):
+        """iter_records should give byte ranges that re-read the same records."""
+        from lab4_csv_reader import iter_records, iter_rows
+
+        path = str(tmp_dir / "quoted.csv")
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f)
+            writer.writerow(["sample_id", "notes"])
+            writer.writerow(["GEO-001", "plain"])
+            writer.writerow(["GEO-002", "line one\nline two, \"quoted\""])
+            f.write("\n")
+            writer.writerow(["GEO-003", "last"])
+
+        records = list(iter_records(path))
+        assert [values for _, _, values in records] == list(iter_rows(path))
+        assert records[1][2] == ["GEO-002", 'line one\nline two, "quoted"']
+        for start, end, values in records:
+            assert [v for _, _, v in iter_records(path, start, end)] == [values]
+        assert list(iter_rows(path, records[1][0])) == [records[1][2], ["GEO-003", "last"]]
+
+    def test_reservoir_sample_is_deterministic(self, samples_csv_path):
+        """reservoir_sample should return k rows, the same for the same seed."""
+        from lab4_csv_reader import reservoir_sample
+
+        first = reservoir_sample(samples_csv_path, 5, seed=42)
+        assert len(first) == 5
+        assert first == reservoir_sample(samples_csv_path, 5, seed=42)
+        ids = [row["sample_id"] for row in first]
+        assert ids == sorted(ids), "Rows should come back in file order"
+        assert len(reservoir_sample(samples_csv_path, 100, seed=1)) == 50
+
+        per_site = reservoir_sample(samples_csv_path, 3, seed=7, stratify_by="location")
+        assert set(per_site) == {"Site-A", "Site-B"}
+        for location, rows in per_site.items():
+            assert len(rows) == 3
+            assert all(row["location"] == location for row in rows)
+
+    def test_seek_sample_returns_whole_records(self, samples_csv_path):
+        """seek_sample should resync to record boundaries."""
+        from lab4_csv_reader import seek_sample
+
+        rows = seek_sample(samples_csv_path, 10, seed=3)
+        assert 0 < len(rows) <= 10
+        assert rows == seek_sample(samples_csv_path, 10, seed=3)
+        with open(samples_csv_path, newline="") as f:
+            all_rows = list(csv.DictReader(f))
+        for row in rows:
+            assert row in all_rows
+
+    def test_seek_sample_skips_multiline_fragments(self, tmp_dir):
+        """Landing inside a quoted multi-line field should be a miss, not a crash."""
+        from lab4_csv_reader import seek_sample
+
+        path = str(tmp_dir / "notes.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["sample_id", "notes", "grade"])
+            for i in range(200):
+                writer.writerow([f"GEO-{i:03d}", f"core \"{i}\"\nbroken, re-logged\nok", "1.5"])
+        with open(path, newline="") as f:
+            all_rows = list(csv.DictReader(f))
+
+        for seed in range(20):
+            rows = seek_sample(path, 10, seed=seed)
+            assert rows, "Some seeks should land on record starts"
+            for row in rows:
+                assert row in all_rows
+
+    def test_read_columns_dictionary_encodes_categoricals(self, samples_csv_path):
+        """Low-cardinality columns should be stored as codes plus a lookup table."""
+        from lab4_csv_reader import read_columns
+
+        store = read_columns(samples_csv_path, max_cardinality=10)
+        assert store.is_encoded("rock_type") and store.is_encoded("location")
+        assert not store.is_encoded("sample_id"), "50 distinct ids exceed the limit"
+        assert sorted(store.dictionaries["location"]) == ["Site-A", "Site-B"]
+        assert store.columns["rock_type"].typecode == "B"
+        assert store.row(0)["rock_type"] == "Granite"
+        assert store.value(49, "sample_id") == "GEO-050"
+
+        explicit = read_columns(samples_csv_path, categorical=["grade"])
+        assert explicit.is_encoded("grade") and not explicit.is_encoded("rock_type")
+
+    def test_read_samples_as_dict_shares_categorical_strings(self, samples_csv_path):
+        """Categorical values should be shared objects across rows."""
+        from lab4_csv_reader import read_samples_as_dict
+
+        plain = read_samples_as_dict(samples_csv_path)
+        shared = read_samples_as_dict(samples_csv_path, categorical=["rock_type"])
+        assert shared == plain
+        granite = [row["rock_type"] for row in shared if row["rock_type"] == "Granite"]
+        assert all(value is granite[0] for value in granite)
+
     def test_with_real_data_file(self, samples_csv_path):
         """CSV reader functions should work with the real samples.csv."""
         from lab4_csv_reader import get_row_count
@@ -369,6 +600,51 @@ class TestTask3CSVWriter:
         assert isinstance(result, int), "merge_csv_files must return an integer"
         assert result == 3, "Should have 3 merged data rows"
 
+    def test_sort_csv_by_column_with_small_chunks(self, small_csv, tmp_dir):
+        """sort_csv_by_column should merge several sorted runs."""
+        from lab4_csv_writer import sort_csv_by_column
+
+        output_path = str(tmp_dir / "sorted.csv")
+        assert sort_csv_by_column(small_csv, output_path, "grade", chunk_rows=1) == 4
+        with open(output_path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        assert [row["grade"] for row in rows] == ["1.8", "2.5", "3.2", "4.1"]
+        assert sorted(os.listdir(tmp_dir)) == ["sorted.csv", "test_samples.csv"], \
+            "Temporary run files should be removed"
+
+    def test_merge_csv_files_drops_duplicates(self, small_csv, tmp_dir):
+        """Duplicate sample_ids should be found and optionally dropped."""
+        from lab4_csv_writer import find_duplicate_ids, merge_csv_files
+
+        second = str(tmp_dir / "second_export.csv")
+        with open(second, "w", newline="") as f:
+            f.write("sample_id,rock_type,grade,depth,mass,location\n")
+            f.write("GEO-003,Granite,1.8,180,11.8,Site-B\n")
+            f.write("GEO-005,Basalt,2.2,120,13.0,Site-A\n")
+            f.write("GEO-003,Granite,1.9,181,11.8,Site-B\n")
+
+        assert find_duplicate_ids([small_csv, second]) == {"GEO-003": 3}
+        output_path = str(tmp_dir / "merged.csv")
+        assert merge_csv_files([small_csv, second], output_path) == 7
+        assert merge_csv_files([small_csv, second], output_path, drop_duplicates=True) == 5
+        with open(output_path, newline="") as f:
+            ids = [row["sample_id"] for row in csv.DictReader(f)]
+        assert ids == ["GEO-001", "GEO-002", "GEO-003", "GEO-004", "GEO-005"]
+
+    def test_bloom_filter_has_no_false_negatives(self):
+        """BloomFilter should remember every key it was given."""
+        from lab4_csv_writer import BloomFilter
+
+        bloom = BloomFilter(expected_items=2000, false_positive_rate=0.01)
+        keys = [f"GEO-{i:05d}" for i in range(2000)]
+        assert bloom.add("GEO-X") is False
+        assert bloom.add("GEO-X") is True
+        for key in keys:
+            bloom.add(key)
+        assert all(key in bloom for key in keys)
+        false_positives = sum(f"OTHER-{i}" in bloom for i in range(2000))
+        assert false_positives < 100
+
     def test_create_sample_csv(self, tmp_dir):
         """create_sample_csv should create a CSV with generated data."""
         from lab4_csv_writer import create_sample_csv
@@ -431,6 +707,21 @@ class TestTask4DataProcessor:
         assert "Site-B" in result, "Should have Site-B group"
         assert len(result["Site-A"]) == 2, "Site-A should have 2 samples"
 
+    def test_group_by_location_views(self, small_csv):
+        """as_views=True should return lazy row views over a shared store."""
+        from lab4_data_processor import group_by_location
+
+        ids = group_by_location(small_csv)
+        views = group_by_location(small_csv, as_views=True)
+        assert set(views) == set(ids)
+        assert views["Site-A"].column("sample_id") == ids["Site-A"]
+        assert views["Site-B"][1] == {
+            "sample_id": "GEO-004", "rock_type": "Schist", "grade": "4.1",
+            "depth": "250", "mass": "14.5", "location": "Site-B",
+        }
+        assert views["Site-A"].store is views["Site-B"].store
+        assert [row["grade"] for row in views["Site-A"]] == ["2.5", "3.2"]
+
     def test_count_by_rock_type_returns_dict(self, small_csv):
         """count_by_rock_type should return a dictionary of counts."""
         from lab4_data_processor import count_by_rock_type
@@ -468,6 +759,497 @@ class TestTask4DataProcessor:
         assert isinstance(result, list), "Must return a list"
         assert len(result) == 3, "Should find 3 samples with depth 150-200"
 
+    def test_incremental_aggregates_read_only_appended_rows(self, small_csv):
+        """Incremental aggregates should pick up appended rows."""
+        from lab4_csv_writer import append_row_to_csv
+        from lab4_data_processor import (
+            calculate_statistics, count_by_rock_type, group_by_location,
+            update_aggregate_store,
+        )
+
+        assert count_by_rock_type(small_csv, incremental=True) == \
+            count_by_rock_type(small_csv)
+        offset = update_aggregate_store(small_csv)["offset"]
+        append_row_to_csv(small_csv, {
+            "sample_id": "GEO-005", "rock_type": "Granite", "grade": "5.0",
+            "depth": "300", "mass": "10.0", "location": "Site-C",
+        })
+        assert count_by_rock_type(small_csv, incremental=True)["Granite"] == 3
+        assert group_by_location(small_csv, incremental=True)["Site-C"] == ["GEO-005"]
+        stats = calculate_statistics(small_csv, "grade", incremental=True)
+        assert stats == calculate_statistics(small_csv, "grade")
+        assert stats["max"] == 5.0
+        assert update_aggregate_store(small_csv)["offset"] > offset
+
+    def test_incremental_aggregates_sidecars(self, small_csv):
+        """None keys should survive the sidecar, and unchanged files skip the rewrite."""
+        from lab4_data_processor import (
+            AGGREGATE_STORE_SUFFIX, LOCATION_IDS_SUFFIX, count_by_rock_type,
+            group_by_location,
+        )
+
+        with open(small_csv, "a", newline="") as f:
+            f.write("GEO-005\n")
+        expected = count_by_rock_type(small_csv)
+        assert expected[None] == 1
+        assert count_by_rock_type(small_csv, incremental=True) == expected
+
+        store_path = small_csv + AGGREGATE_STORE_SUFFIX
+        os.utime(store_path, (0, 0))
+        assert count_by_rock_type(small_csv, incremental=True) == expected
+        assert os.path.getmtime(store_path) == 0, "Nothing appended, so no rewrite"
+        with open(store_path) as f:
+            assert "GEO-" not in f.read(), "sample_ids live in the locations sidecar"
+
+        groups = group_by_location(small_csv, incremental=True)
+        assert groups[None] == ["GEO-005"]
+        assert groups["Site-A"] == group_by_location(small_csv)["Site-A"]
+
+        # Lines from an update that crashed before saving the store are dropped
+        with open(small_csv + LOCATION_IDS_SUFFIX, "a") as f:
+            f.write('["Site-Z", "GEO-999"]\n')
+        with open(small_csv, "a", newline="") as f:
+            f.write("GEO-006,Granite,1.0,100,10.0,Site-B\n")
+        groups = group_by_location(small_csv, incremental=True)
+        assert "Site-Z" not in groups and groups["Site-B"][-1] == "GEO-006"
+
+    def test_incremental_aggregates_recompute_after_rewrite(self, small_csv):
+        """A rewritten file should trigger a full recompute."""
+        from lab4_data_processor import count_by_rock_type
+
+        count_by_rock_type(small_csv, incremental=True)
+        with open(small_csv, "w", newline="") as f:
+            f.write("sample_id,rock_type,grade,depth,mass,location\n")
+            f.write("GEO-010,Basalt,1.0,100,10.0,Site-A\n")
+        assert count_by_rock_type(small_csv, incremental=True) == {"Basalt": 1}
+
+    def test_incremental_aggregates_detect_same_size_edit(self, tmp_dir):
+        """In-place edits in the sampled blocks should force a recompute."""
+        from lab4_data_processor import AGGREGATE_CHECK_BYTES, count_by_rock_type
+
+        path = str(tmp_dir / "granite.csv")
+        lines = [f"GEO-{i:04d},Granite,1.0,100,10.0,Site-A\n" for i in range(2000)]
+        with open(path, "w", newline="") as f:
+            f.write("sample_id,rock_type,grade,depth,mass,location\n")
+            f.writelines(lines)
+        assert count_by_rock_type(path, incremental=True) == {"Granite": 2000}
+
+        def edit_row(row):
+            with open(path, "r+b") as f:
+                data = f.read()
+                offset = data.index(f"GEO-{row:04d},Granite".encode()) + 9
+                f.seek(offset)
+                f.write(b"Basalt ")
+            return offset
+
+        edit_row(1)
+        assert count_by_rock_type(path, incremental=True) == \
+            {"Granite": 1999, "Basalt ": 1}
+        # Known blind spot: an edit outside the sampled blocks keeps the size
+        # and checksums, so the stored aggregates are reused
+        offset = edit_row(500)
+        assert AGGREGATE_CHECK_BYTES < offset < os.path.getsize(path) // 2 - \
+            AGGREGATE_CHECK_BYTES
+        assert count_by_rock_type(path, incremental=True) == \
+            {"Granite": 1999, "Basalt ": 1}
+
+    def test_calculate_statistics_exact_quantiles(self, depth_ordered_csv):
+        """calculate_statistics should add exact quantiles for small files."""
+        from lab4_data_processor import calculate_statistics
+
+        result = calculate_statistics(depth_ordered_csv, "depth",
+                                      quantiles=[0.5, 0.9, 0.99])
+        # depths are 50, 55, ..., 545
+        assert result["p50"] == 295
+        assert result["p90"] == 495
+        assert result["p99"] == 540
+
+    def test_quantile_sketch_error_bound_and_merge(self):
+        """QuantileSketch estimates should stay within the rank error."""
+        import random
+        from lab4_data_processor import QuantileSketch
+
+        values = list(range(20000))
+        random.Random(7).shuffle(values)
+        left, right = QuantileSketch(error=0.02, seed=1), QuantileSketch(error=0.02, seed=2)
+        for value in values[:10000]:
+            left.add(value)
+        for value in values[10000:]:
+            right.add(value)
+        left.merge(right)
+        assert len(left) == 20000
+        assert sum(len(level) for level in left.compactors) < 1000
+        for q in (0.5, 0.9, 0.99):
+            assert abs(left.quantile(q) - q * 20000) <= 0.02 * 20000
+
+    def test_multi_file_aggregations_match_single_file(self, small_csv, tmp_dir):
+        """Multi-file aggregations should match one combined file."""
+        from lab4_data_processor import (
+            calculate_average_by_group, calculate_average_by_group_multi,
+            calculate_statistics, calculate_statistics_multi,
+            count_by_rock_type, count_by_rock_type_multi,
+        )
+
+        with open(small_csv, newline="") as f:
+            rows = list(csv.reader(f))
+        for name, part in [("campaign_1.csv", rows[1:3]), ("campaign_2.csv", rows[3:])]:
+            with open(tmp_dir / name, "w", newline="") as f:
+                csv.writer(f).writerows([rows[0]] + part)
+        pattern = str(tmp_dir / "campaign_*.csv")
+
+        assert calculate_statistics_multi(pattern, "grade", max_workers=2) == \
+            calculate_statistics(small_csv, "grade")
+        assert count_by_rock_type_multi(pattern, max_workers=2) == \
+            count_by_rock_type(small_csv)
+        paths = [str(tmp_dir / "campaign_1.csv"), str(tmp_dir / "campaign_2.csv")]
+        assert calculate_average_by_group_multi(paths, "location", "grade", max_workers=1) == \
+            calculate_average_by_group(small_csv, "location", "grade")
+
+    def test_checkpointed_aggregations_resume_after_crash(self, depth_ordered_csv,
+                                                          tmp_dir, monkeypatch):
+        """A crashed aggregation should resume from its last checkpoint."""
+        import lab4_data_processor
+        from lab4_data_processor import (
+            calculate_average_by_group, calculate_statistics, count_by_rock_type,
+        )
+
+        from lab4_error_handling import load_checkpoint
+
+        checkpoint = str(tmp_dir / "grade.ckpt")
+        real_convert = lab4_data_processor.safe_convert_numeric
+        calls = []
+        limit = [45]
+
+        def crashing_convert(value, default=None):
+            calls.append(value)
+            if len(calls) > limit[0]:
+                raise RuntimeError("worker died")
+            return real_convert(value, default)
+
+        monkeypatch.setattr(lab4_data_processor, "safe_convert_numeric", crashing_convert)
+        with pytest.raises(RuntimeError):
+            calculate_statistics(depth_ordered_csv, "grade",
+                                 checkpoint=checkpoint, checkpoint_every=20)
+        job = ["statistics", "grade"]
+        assert load_checkpoint(checkpoint, depth_ordered_csv, job)["row_number"] == 40
+
+        calls.clear()
+        limit[0] = 1000
+        assert calculate_statistics(depth_ordered_csv, "grade", checkpoint=checkpoint,
+                                    checkpoint_every=20) == \
+            calculate_statistics(depth_ordered_csv, "grade")
+        assert len(calls) == 60  # rows 41-100 only
+        assert not os.path.exists(checkpoint)
+
+        assert count_by_rock_type(depth_ordered_csv, checkpoint=checkpoint,
+                                  checkpoint_every=7) == count_by_rock_type(depth_ordered_csv)
+        assert calculate_average_by_group(depth_ordered_csv, "location", "grade",
+                                          checkpoint=checkpoint, checkpoint_every=7) == \
+            calculate_average_by_group(depth_ordered_csv, "location", "grade")
+
+    def test_checkpointed_state_keeps_none_keys(self, small_csv, tmp_dir):
+        """A resumed count should keep None (short-row) keys, not turn them into 'null'."""
+        from lab4_data_processor import count_by_rock_type
+        from lab4_error_handling import iter_checkpointed_records
+
+        with open(small_csv, "a", newline="") as f:
+            f.write("GEO-005\n")
+            f.write("GEO-006,Granite,1.0,100,10.0,Site-A\n")
+        checkpoint = str(tmp_dir / "counts.ckpt")
+        counts = {}
+        for row_number, values in iter_checkpointed_records(small_csv, checkpoint,
+                                                            ["rock_types"], counts, 5):
+            if row_number > 5:
+                break  # crash after the checkpoint that holds the None key
+            rock_type = values[1] if len(values) > 1 else None
+            counts[rock_type] = counts.get(rock_type, 0) + 1
+        assert os.path.exists(checkpoint)
+
+        resumed = count_by_rock_type(small_csv, checkpoint=checkpoint, checkpoint_every=5)
+        assert resumed == count_by_rock_type(small_csv)
+        assert resumed[None] == 1
+
+    def test_checkpoint_ignored_when_input_changes(self, small_csv, tmp_dir):
+        """A checkpoint should only be used for the same job and unchanged input."""
+        from lab4_error_handling import load_checkpoint, save_checkpoint
+
+        checkpoint = str(tmp_dir / "job.ckpt")
+        save_checkpoint(checkpoint, small_csv, ["rock_types"], 100, 2, {"Granite": 2})
+        assert load_checkpoint(checkpoint, small_csv, ["rock_types"])["state"] == \
+            {"Granite": 2}
+        assert load_checkpoint(checkpoint, small_csv, ["statistics", "grade"]) is None
+        with open(small_csv, "a", newline="") as f:
+            f.write("GEO-005,Granite,1.0,100,10.0,Site-A\n")
+        assert load_checkpoint(checkpoint, small_csv, ["rock_types"]) is None
+
+    def test_dataset_fused_query_matches_step_by_step(self, depth_ordered_csv):
+        """Dataset filter/group/agg should match the separate functions."""
+        from lab4_data_processor import Dataset, find_depth_range_samples
+
+        query = (Dataset(depth_ordered_csv)
+                 .filter("depth", ">=", 120)
+                 .filter("depth", "<=", 260)
+                 .group_by("location")
+                 .agg(mean_grade=("grade", "mean"), samples=("grade", "count")))
+        result = query.collect()
+
+        expected = {}
+        for row in find_depth_range_samples(depth_ordered_csv, 120, 260):
+            expected.setdefault(row["location"], []).append(float(row["grade"]))
+        assert set(result) == set(expected)
+        for location, grades in expected.items():
+            assert result[location]["samples"] == len(grades)
+            assert result[location]["mean_grade"] == round(sum(grades) / len(grades), 2)
+
+    def test_dataset_explain_and_select(self, depth_ordered_csv):
+        """explain() should list read columns, pushed predicates and zone maps."""
+        from lab4_data_processor import Dataset, build_zone_map
+
+        build_zone_map(depth_ordered_csv, ["depth"], block_rows=10)
+        query = Dataset(depth_ordered_csv).filter("depth", "<", 70).select("sample_id")
+        plan = query.explain()
+        assert "columns read = sample_id, depth" in plan
+        assert "depth < 70" in plan
+        assert "zone map on depth" in plan
+        assert query.collect() == [
+            {"sample_id": "GEO-001"}, {"sample_id": "GEO-002"},
+            {"sample_id": "GEO-003"}, {"sample_id": "GEO-004"},
+        ]
+
+    def test_query_cache_hits_and_fingerprint_invalidation(self, small_csv, tmp_dir):
+        """QueryCache should reuse results until the file changes."""
+        from lab4_csv_writer import append_row_to_csv
+        from lab4_data_processor import QueryCache, find_depth_range_samples
+
+        cache = QueryCache(max_entries=2, cache_dir=str(tmp_dir / "cache"))
+        first = cache.get_or_compute(find_depth_range_samples, small_csv, 150, 200)
+        second = cache.get_or_compute(find_depth_range_samples, small_csv, 150, 200)
+        assert first == second and len(first) == 3
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # A fresh cache over the same directory is served from disk
+        on_disk = QueryCache(cache_dir=str(tmp_dir / "cache"))
+        assert on_disk.get_or_compute(find_depth_range_samples, small_csv, 150, 200) == first
+        assert on_disk.hits == 1
+
+        append_row_to_csv(small_csv, {
+            "sample_id": "GEO-005", "rock_type": "Granite", "grade": "2.0",
+            "depth": "160", "mass": "10.0", "location": "Site-A",
+        })
+        assert len(cache.get_or_compute(find_depth_range_samples, small_csv, 150, 200)) == 4
+        assert cache.misses == 2
+
+    def test_query_cache_bounds_disk_tier(self, small_csv, tmp_dir):
+        """Stale fingerprints are evicted and the disk tier is capped."""
+        from lab4_csv_writer import append_row_to_csv
+        from lab4_data_processor import QueryCache, find_depth_range_samples
+
+        cache_dir = str(tmp_dir / "cache")
+        cache = QueryCache(cache_dir=cache_dir, max_disk_entries=2)
+        for low in (100, 120, 140):
+            cache.get_or_compute(find_depth_range_samples, small_csv, low, 200)
+        assert len(os.listdir(cache_dir)) == 2
+
+        append_row_to_csv(small_csv, {
+            "sample_id": "GEO-005", "rock_type": "Granite", "grade": "2.0",
+            "depth": "160", "mass": "10.0", "location": "Site-A",
+        })
+        cache.get_or_compute(find_depth_range_samples, small_csv, 100, 200)
+        assert len(os.listdir(cache_dir)) == 1
+        assert len(cache._entries) == 1
+
+    def test_query_cache_lru_and_invalidate(self, small_csv):
+        """The in-memory tier is size-bounded and can be invalidated."""
+        from lab4_data_processor import QueryCache, calculate_average_by_group
+
+        cache = QueryCache(max_entries=1)
+        cache.get_or_compute(calculate_average_by_group, small_csv, "location", "grade")
+        cache.get_or_compute(calculate_average_by_group, small_csv, "rock_type", "grade")
+        cache.get_or_compute(calculate_average_by_group, small_csv, "location", "grade")
+        assert cache.misses == 3
+        assert cache.invalidate(small_csv) == 1
+        cache.get_or_compute(calculate_average_by_group, small_csv, "location", "grade")
+        assert cache.misses == 4
+
+    def test_join_hash_and_sort_merge_agree(self, small_csv, tmp_dir):
+        """join should enrich samples with site metadata by either method."""
+        from lab4_data_processor import join
+
+        sites_path = str(tmp_dir / "sites.csv")
+        with open(sites_path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["location", "licence", "mass"])
+            writer.writerow(["Site-B", "LIC-2", "n/a"])
+            writer.writerow(["Site-A", "LIC-1", "n/a"])
+
+        results = {}
+        for how in ("inner", "left"):
+            for method in ("hash", "sort_merge"):
+                output_path = str(tmp_dir / f"{how}_{method}.csv")
+                count = join(small_csv, sites_path, "location", output_path,
+                             how=how, method=method)
+                assert count == 4
+                with open(output_path, newline="") as f:
+                    rows = list(csv.DictReader(f))
+                results[how, method] = sorted(rows, key=lambda row: row["sample_id"])
+        assert results["inner", "hash"] == results["inner", "sort_merge"]
+        assert results["left", "hash"] == results["inner", "hash"]
+        first = results["inner", "hash"][0]
+        assert first["licence"] == "LIC-1" and first["right_mass"] == "n/a"
+
+    def test_left_join_keeps_unmatched_rows(self, small_csv, tmp_dir):
+        """A left join should keep samples whose location has no metadata."""
+        from lab4_data_processor import join
+
+        sites_path = str(tmp_dir / "sites.csv")
+        with open(sites_path, "w", newline="") as f:
+            f.write("location,licence\nSite-A,LIC-1\n")
+        for method in ("hash", "sort_merge"):
+            output_path = str(tmp_dir / f"left_{method}.csv")
+            assert join(small_csv, sites_path, "location", output_path,
+                        how="left", method=method) == 4
+            assert join(small_csv, sites_path, "location", output_path,
+                        how="inner", method=method) == 2
+
+    def test_pivot_counts_and_means(self, small_csv, tmp_dir):
+        """pivot should build the rock_type x location table in one scan."""
+        from lab4_data_processor import pivot
+
+        counts = pivot(small_csv, "rock_type", "location")
+        assert counts == {
+            "Basalt": {"Site-A": 1, "Site-B": 0},
+            "Granite": {"Site-A": 1, "Site-B": 1},
+            "Schist": {"Site-A": 0, "Site-B": 1},
+        }
+        output_path = str(tmp_dir / "pivot.csv")
+        means = pivot(small_csv, "rock_type", "location", value="grade",
+                      agg="mean", output_path=output_path)
+        assert means["Granite"] == {"Site-A": 2.5, "Site-B": 1.8}
+        assert means["Basalt"]["Site-B"] is None
+        with open(output_path, newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == ["rock_type", "Site-A", "Site-B"]
+        assert rows[1] == ["Basalt", "3.2", ""]
+
+    def test_top_k_by_group(self, small_csv, samples_csv_path):
+        """top_k_by_group should keep the k highest values per group."""
+        from lab4_data_processor import top_k_by_group
+
+        top = top_k_by_group(small_csv, "location", "grade", 1)
+        assert {group: [row["sample_id"] for row in rows] for group, rows in top.items()} == \
+            {"Site-A": ["GEO-002"], "Site-B": ["GEO-004"]}
+
+        top = top_k_by_group(samples_csv_path, "rock_type", "grade", 3)
+        with open(samples_csv_path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        for rock_type, ranked in top.items():
+            expected = sorted((float(r["grade"]) for r in rows if r["rock_type"] == rock_type),
+                              reverse=True)[:3]
+            assert [float(r["grade"]) for r in ranked] == expected
+
+    def test_calculate_binned_statistics_matches_range_queries(self, samples_csv_path):
+        """Each bin should agree with a find_depth_range_samples query."""
+        from lab4_data_processor import calculate_binned_statistics, find_depth_range_samples
+
+        profile = calculate_binned_statistics(samples_csv_path, "depth", "grade",
+                                              edges=[0, 100, 300, 500], use_numpy=False)
+        assert [b["count"] for b in profile] == [7, 23, 20]
+        assert sum(b["count"] for b in profile) == 50
+        in_range = find_depth_range_samples(samples_csv_path, 100, 299)
+        grades = [float(row["grade"]) for row in in_range]
+        assert profile[1]["count"] == len(in_range)
+        assert profile[1]["mean"] == round(sum(grades) / len(grades), 2)
+        assert profile[1]["max"] == max(grades)
+
+        widths = calculate_binned_statistics(samples_csv_path, bin_width=50, use_numpy=False)
+        assert widths[0]["bin_start"] == 50 and widths[0]["bin_end"] == 100
+        assert sum(b["count"] for b in widths) == 50
+
+    def test_calculate_binned_statistics_skips_non_finite(self, small_csv, monkeypatch):
+        """NaN/inf bin values are dropped and batches merge into the same profile."""
+        import lab4_data_processor
+        from lab4_data_processor import calculate_binned_statistics
+
+        expected = {
+            use_numpy: [calculate_binned_statistics(small_csv, edges=edges, use_numpy=use_numpy)
+                        for edges in (None, [0, 200, 300])]
+            for use_numpy in (False, True) if not use_numpy or lab4_data_processor.np
+        }
+        with open(small_csv, "a", newline="") as f:
+            f.write("GEO-005,Granite,2.0,nan,10.0,Site-A\n")
+            f.write("GEO-006,Granite,2.0,inf,10.0,Site-A\n")
+            f.write("GEO-007,Granite,nan,-inf,10.0,Site-A\n")
+        monkeypatch.setattr(lab4_data_processor, "CONVERT_BATCH_ROWS", 2)
+        for use_numpy, profiles in expected.items():
+            assert [calculate_binned_statistics(small_csv, edges=edges, use_numpy=use_numpy)
+                    for edges in (None, [0, 200, 300])] == profiles
+
+        with open(small_csv, "a", newline="") as f:
+            f.write("GEO-008,Granite,nan,160,10.0,Site-A\n")
+        profile = calculate_binned_statistics(small_csv, edges=[150, 200], use_numpy=False)
+        assert profile[0]["count"] == 4 and profile[0]["mean"] == 2.5
+
+    def test_calculate_binned_statistics_numpy_path(self, samples_csv_path):
+        """The NumPy path should give the same profile as pure Python."""
+        pytest.importorskip("numpy")
+        from lab4_data_processor import calculate_binned_statistics
+
+        for edges in (None, [0, 100, 300, 500]):
+            assert calculate_binned_statistics(samples_csv_path, edges=edges, use_numpy=True) == \
+                calculate_binned_statistics(samples_csv_path, edges=edges, use_numpy=False)
+
+    def test_csv_diff_reports_added_removed_changed(self, small_csv, tmp_dir):
+        """csv_diff should find added, removed and changed sample_ids."""
+        from lab4_data_processor import csv_diff
+
+        new_path = str(tmp_dir / "revised.csv")
+        with open(new_path, "w", newline="") as f:
+            f.write("sample_id,rock_type,grade,depth,mass,location\n")
+            f.write("GEO-004,Schist,4.1,250,14.5,Site-B\n")
+            f.write("GEO-002,Basalt,3.5,200,15.1,Site-A\n")
+            f.write("GEO-001,Granite,2.5,150,12.3,Site-A\n")
+            f.write("GEO-007,Basalt,1.1,90,9.0,Site-B\n")
+
+        output_path = str(tmp_dir / "changes.csv")
+        counts = csv_diff(small_csv, new_path, "sample_id", output_path, chunk_rows=2)
+        assert counts == {"added": 1, "removed": 1, "changed": 1}
+        with open(output_path, newline="") as f:
+            rows = [(row["change"], row["sample_id"], row["grade"]) for row in csv.DictReader(f)]
+        assert rows == [
+            ("changed", "GEO-002", "3.5"),
+            ("removed", "GEO-003", "1.8"),
+            ("added", "GEO-007", "1.1"),
+        ]
+
+    def test_zone_map_range_queries_match_full_scan(self, depth_ordered_csv):
+        """Range queries should give the same answer with a zone map sidecar."""
+        from lab4_data_processor import (
+            build_zone_map, find_depth_range_samples, find_high_grade_samples
+        )
+
+        expected_depth = find_depth_range_samples(depth_ordered_csv, 120, 260)
+        expected_grade = find_high_grade_samples(depth_ordered_csv, 4.0)
+        zone_map = build_zone_map(depth_ordered_csv, ["grade", "depth"], block_rows=10)
+        assert len(zone_map["blocks"]) == 10
+        assert os.path.exists(depth_ordered_csv + ".zonemap.json")
+        assert find_depth_range_samples(depth_ordered_csv, 120, 260) == expected_depth
+        assert find_high_grade_samples(depth_ordered_csv, 4.0) == expected_grade
+        assert len(expected_depth) == 29
+
+    def test_zone_map_skips_blocks_and_detects_changes(self, depth_ordered_csv):
+        """Only blocks overlapping the range are read; stale maps are ignored."""
+        from lab4_data_processor import _candidate_ranges, build_zone_map, load_zone_map
+
+        build_zone_map(depth_ordered_csv, ["depth"], block_rows=10)
+        # depths 120-260 live in rows 15-43, i.e. blocks 1-4, merged into one range
+        assert len(_candidate_ranges(depth_ordered_csv, "depth", 120, 260)) == 1
+        assert _candidate_ranges(depth_ordered_csv, "depth", 5000, 6000) == []
+
+        with open(depth_ordered_csv, "a", newline="") as f:
+            f.write("GEO-101,Granite,1.0,5500,12.0,Site-A\n")
+        assert load_zone_map(depth_ordered_csv) is None
+        assert _candidate_ranges(depth_ordered_csv, "depth", 5000, 6000) == [(None, None)]
+
 
 # ========================================================================
 # Task 5: Error Handling
@@ -501,6 +1283,36 @@ class TestTask5ErrorHandling:
         assert isinstance(result, tuple), "Must return a tuple"
         assert result[0] is False, "First element should be False for error"
 
+    def test_safe_read_file_modes(self, small_csv, tmp_dir):
+        """safe_read_file should support mmap, chunked and size-guarded reads."""
+        from lab4_error_handling import safe_read_file
+
+        with open(small_csv) as f:
+            content = f.read()
+
+        success, data = safe_read_file(small_csv, mode="mmap")
+        assert success
+        with data:
+            with open(small_csv, "rb") as f:
+                assert data[:] == f.read()
+            with pytest.raises(TypeError):
+                data[0] = 0
+
+        success, chunks = safe_read_file(small_csv, mode="chunks", chunk_size=16)
+        assert success
+        chunks = list(chunks)
+        assert "".join(chunks) == content and max(map(len, chunks)) == 16
+
+        assert safe_read_file(small_csv, mode="auto") == (True, content)
+        empty = str(tmp_dir / "empty.txt")
+        open(empty, "w").close()
+        assert safe_read_file(empty, mode="mmap")[1] == b""
+
+        success, message = safe_read_file(small_csv, max_bytes=10)
+        assert not success and message.startswith("File too large")
+        assert safe_read_file("/nonexistent/file.txt", mode="chunks") == \
+            (False, "File not found: /nonexistent/file.txt")
+
     def test_safe_read_csv_existing(self, small_csv):
         """safe_read_csv should successfully read an existing CSV file."""
         from lab4_error_handling import safe_read_csv
@@ -568,6 +1380,48 @@ class TestTask5ErrorHandling:
         assert safe_convert_numeric("N/A", default=0.0) == 0.0
         assert safe_convert_numeric("", default=None) is None
 
+    def test_convert_column_bulk_conversion(self):
+        """convert_column should convert a column with a failure mask."""
+        import math
+        from lab4_error_handling import convert_column
+
+        numbers, ok, failures = convert_column(["2.5", "N/A", "", "2.5", None])
+        assert numbers.typecode == "d"
+        assert numbers[0] == numbers[3] == 2.5
+        assert math.isnan(numbers[1])
+        assert list(ok) == [1, 0, 0, 1, 0]
+        assert failures == {"empty": 2, "invalid": 1}
+
+        numbers, ok, failures = convert_column(["7", "2.5"], default=-1, kind="int")
+        assert list(numbers) == [7, -1] and failures["invalid"] == 1
+
+        numbers, ok, failures = convert_column(
+            ["99999999999999999999", str(2 ** 63 - 1), str(-2 ** 63)], kind="int")
+        assert list(ok) == [0, 1, 1] and failures["invalid"] == 1
+        assert list(numbers) == [0, 2 ** 63 - 1, -2 ** 63]
+
+    def test_schema_check_columns_matches_row_checks(self, small_csv):
+        """Column-at-a-time checks should agree with per-row checks."""
+        from lab4_error_handling import Schema
+
+        schema = Schema(required=["sample_id", "grade"], numeric=["mass"],
+                        ranges={"depth": (0, 200)})
+        with open(small_csv, newline="") as f:
+            rows = list(csv.DictReader(f))
+        rows[1]["grade"] = ""
+        rows[2]["mass"] = "heavy"
+        columns = {field: [row[field] for row in rows] for field in rows[0]}
+        expected = {i: schema.check(row) for i, row in enumerate(rows) if schema.check(row)}
+        assert schema.check_columns(columns) == expected
+        assert set(expected) == {1, 2, 3}
+
+        # NaN is out of any range, and an absent column still counts rows
+        assert schema.check_columns({"depth": ["nan"]}, row_count=1) == \
+            schema.check_columns({"depth": ["nan"]}) == \
+            {0: [("sample_id", "missing"), ("grade", "missing"), ("mass", "not_numeric"),
+                 ("depth", "out_of_range")]}
+        assert schema.check_columns({}, row_count=2).keys() == {0, 1}
+
     def test_check_file_exists_true(self, small_csv):
         """check_file_exists should return True for existing file."""
         from lab4_error_handling import check_file_exists
@@ -604,6 +1458,243 @@ class TestTask5ErrorHandling:
         assert "invalid_rows" in result, "Should have 'invalid_rows' key"
         assert "error_count" in result, "Should have 'error_count' key"
 
+    def test_schema_compiles_all_rule_kinds(self):
+        """Schema should check required, numeric, range and allowed rules."""
+        from lab4_error_handling import Schema
+
+        schema = Schema(required=["sample_id"], numeric=["grade"],
+                        ranges={"depth": (0, 1000)},
+                        allowed={"location": {"Site-A", "Site-B"}})
+        row = {"sample_id": "", "grade": "x", "depth": "5000", "location": "Site-C"}
+        assert schema.check(row) == [
+            ("sample_id", "missing"), ("grade", "not_numeric"),
+            ("depth", "out_of_range"), ("location", "not_allowed"),
+        ]
+        valid, errors = schema.validate(row)
+        assert valid is False
+        assert errors[0] == "Field 'sample_id' is missing or empty"
+        assert errors[2] == "Field 'depth' is out of range [0, 1000]"
+        assert schema.validate({"sample_id": "GEO-001", "grade": "2.5", "depth": "10",
+                                "location": "Site-A"}) == (True, [])
+        # Empty optional fields only fail the numeric rule
+        assert schema.check({"sample_id": "GEO-001", "grade": "", "depth": "10"}) == \
+            [("grade", "not_numeric")]
+        assert schema.check({"sample_id": "GEO-001", "grade": "1", "depth": "10",
+                             "location": ""}) == []
+
+    def test_schema_range_limits_and_empty_numeric_fields(self):
+        """Infinite range limits work and empty numeric fields are not numbers."""
+        from lab4_error_handling import Schema, validate_csv_row
+
+        schema = Schema(ranges={"depth": (0, float("inf"))})
+        assert schema.check({"depth": "1e308"}) == []
+        assert schema.check({"depth": "-1"}) == [("depth", "out_of_range")]
+        assert schema.check_columns({"depth": ["5", "-1", ""]}) == \
+            {1: [("depth", "out_of_range")], 2: [("depth", "not_numeric")]}
+
+        assert validate_csv_row({"sample_id": "x"}, ["sample_id"], ["grade"]) == \
+            (False, ["Field 'grade' is not a valid number"])
+        assert validate_csv_row({"sample_id": "x", "grade": ""}, ["sample_id", "grade"],
+                                ["grade"]) == (False, ["Field 'grade' is missing or empty"])
+
+    def test_process_csv_with_validation_reports_row_numbers(self, small_csv):
+        """Invalid rows should be reported with 1-based row numbers."""
+        from lab4_error_handling import Schema, process_csv_with_validation
+
+        with open(small_csv, "a", newline="") as f:
+            f.write("GEO-005,Granite,n/a,100,10.0,Site-A\n")
+        result = process_csv_with_validation(small_csv)
+        assert len(result["valid_rows"]) == 4
+        assert result["error_count"] == 1
+        row_number, row, errors = result["invalid_rows"][0]
+        assert row_number == 5 and row["sample_id"] == "GEO-005"
+        assert errors == ["Field 'grade' is not a valid number"]
+
+        strict = Schema(required=["sample_id"], ranges={"depth": (0, 180)})
+        assert process_csv_with_validation(small_csv, schema=strict)["error_count"] == 2
+
+    def test_process_csv_with_validation_streaming(self, small_csv, tmp_dir):
+        """Streaming mode should write valid and quarantined rows to CSV."""
+        from lab4_error_handling import process_csv_with_validation
+
+        with open(small_csv, "a", newline="") as f:
+            f.write("GEO-005,Granite,n/a,100,10.0,Site-A\n")
+            f.write(",Basalt,1.0,x,10.0,Site-B\n")
+        valid_path = str(tmp_dir / "valid.csv")
+        quarantine_path = str(tmp_dir / "quarantine.csv")
+        result = process_csv_with_validation(
+            small_csv, valid_output=valid_path, quarantine_output=quarantine_path,
+            max_error_samples=1,
+        )
+        assert result["valid_count"] == 4 and result["error_count"] == 2
+        assert len(result["error_samples"]) == 1
+        assert "valid_rows" not in result
+
+        with open(valid_path, newline="") as f:
+            assert len(list(csv.DictReader(f))) == 4
+        with open(quarantine_path, newline="") as f:
+            quarantined = list(csv.DictReader(f))
+        assert [row["row_number"] for row in quarantined] == ["5", "6"]
+        assert quarantined[1]["errors"] == \
+            "Field 'sample_id' is missing or empty; Field 'depth' is not a valid number"
+
+    def test_process_csv_with_validation_error_summary(self, depth_ordered_csv):
+        """Summary mode should count errors per field and kind with bounded examples."""
+        from lab4_error_handling import process_csv_with_validation
+
+        with open(depth_ordered_csv, "a", newline="") as f:
+            for i in range(10):
+                f.write(f"GEO-{101 + i},Granite,bad,100,10.0,Site-A\n")
+            f.write(",Granite,1.0,deep,10.0,Site-A\n")
+        result = process_csv_with_validation(depth_ordered_csv, summary=True,
+                                             max_examples_per_kind=3)
+        assert result["valid_count"] == 100 and result["error_count"] == 11
+        assert "invalid_rows" not in result and "error_samples" not in result
+        summary = result["error_summary"]
+        assert summary["grade"]["not_numeric"]["count"] == 10
+        assert [row_number for row_number, _ in summary["grade"]["not_numeric"]["examples"]] \
+            == [101, 102, 103]
+        assert summary["sample_id"]["missing"]["count"] == 1
+        assert summary["depth"]["not_numeric"]["examples"][0][0] == 111
+
+    def test_process_csv_with_validation_parallel_matches_serial(self, depth_ordered_csv):
+        """Parallel validation should keep global row numbers and file order."""
+        from lab4_error_handling import process_csv_with_validation
+
+        with open(depth_ordered_csv, "a", newline="") as f:
+            f.write("GEO-101,Granite,bad,100,10.0,Site-A\n")
+            f.write("GEO-102,Granite,1.0,100,10.0,Site-A\n")
+            f.write("GEO-103,,1.0,deep,10.0,Site-A\n")
+        serial = process_csv_with_validation(depth_ordered_csv)
+        parallel = process_csv_with_validation(depth_ordered_csv, workers=2, chunk_bytes=300)
+        assert parallel == serial
+        assert [row_number for row_number, _, _ in parallel["invalid_rows"]] == [101, 103]
+
+    def test_process_csv_with_validation_resumes_from_checkpoint(self, depth_ordered_csv,
+                                                                 tmp_dir):
+        """Checkpointed streaming validation should resume without duplicating rows."""
+        from lab4_error_handling import Schema, process_csv_with_validation
+
+        with open(depth_ordered_csv, "a", newline="") as f:
+            f.write("GEO-101,Granite,bad,100,10.0,Site-A\n")
+            f.write(",Granite,1.0,100,10.0,Site-A\n")
+        rules = dict(required=["sample_id"], numeric=["grade"], ranges={"depth": (0, 300)})
+        expected = process_csv_with_validation(
+            depth_ordered_csv, schema=Schema(**rules),
+            valid_output=str(tmp_dir / "expected_valid.csv"),
+            quarantine_output=str(tmp_dir / "expected_quarantine.csv"))
+
+        schema = Schema(**rules)
+        real_check = schema.check
+
+        def crash_after_70_rows(row, calls=[]):
+            calls.append(row)
+            if len(calls) > 70:
+                raise RuntimeError("worker died")
+            return real_check(row)
+
+        schema.check = crash_after_70_rows
+        paths = dict(valid_output=str(tmp_dir / "valid.csv"),
+                     quarantine_output=str(tmp_dir / "quarantine.csv"))
+        checkpoint = str(tmp_dir / "validation.ckpt")
+        with pytest.raises(RuntimeError):
+            process_csv_with_validation(depth_ordered_csv, schema=schema,
+                                        checkpoint=checkpoint, checkpoint_every=25, **paths)
+        assert os.path.exists(checkpoint)
+
+        result = process_csv_with_validation(depth_ordered_csv, schema=Schema(**rules),
+                                             checkpoint=checkpoint, checkpoint_every=25,
+                                             **paths)
+        assert result == expected
+        assert not os.path.exists(checkpoint)
+        for name in ("valid", "quarantine"):
+            with open(tmp_dir / f"{name}.csv") as f, \
+                    open(tmp_dir / f"expected_{name}.csv") as g:
+                assert f.read() == g.read()
+
+        with pytest.raises(ValueError):
+            process_csv_with_validation(depth_ordered_csv, checkpoint=checkpoint)
+
+    def test_validation_checkpoint_keyed_by_schema_rules(self, depth_ordered_csv, tmp_dir):
+        """A checkpoint must not be reused by a schema with different limits."""
+        from lab4_error_handling import Schema, process_csv_with_validation
+
+        loose = Schema(required=["sample_id"], ranges={"depth": (0, 1000)})
+        strict = Schema(required=["sample_id"], ranges={"depth": (0, 100)})
+        assert loose.source == strict.source and loose.rules() != strict.rules()
+
+        real_check = loose.check
+        calls = []
+
+        def crash_after_60_rows(row):
+            calls.append(row)
+            if len(calls) > 60:
+                raise RuntimeError("worker died")
+            return real_check(row)
+
+        loose.check = crash_after_60_rows
+        paths = dict(valid_output=str(tmp_dir / "valid.csv"),
+                     quarantine_output=str(tmp_dir / "quarantine.csv"))
+        checkpoint = str(tmp_dir / "validation.ckpt")
+        with pytest.raises(RuntimeError):
+            process_csv_with_validation(depth_ordered_csv, schema=loose,
+                                        checkpoint=checkpoint, checkpoint_every=25, **paths)
+        assert os.path.exists(checkpoint)
+
+        resumed = process_csv_with_validation(depth_ordered_csv, schema=strict,
+                                              checkpoint=checkpoint, checkpoint_every=25,
+                                              **paths)
+        clean = process_csv_with_validation(
+            depth_ordered_csv, schema=strict,
+            valid_output=str(tmp_dir / "clean_valid.csv"),
+            quarantine_output=str(tmp_dir / "clean_quarantine.csv"))
+        assert resumed == clean
+
+    def test_parallel_validation_respects_quoted_newlines(self, tmp_dir):
+        """Chunk boundaries must never fall inside a quoted multi-line field."""
+        from lab4_csv_reader import split_record_chunks
+        from lab4_error_handling import process_csv_with_validation
+
+        path = str(tmp_dir / "quoted.csv")
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["sample_id", "rock_type", "grade", "depth", "mass", "location"])
+            for i in range(40):
+                rock_type = "Granite\nweathered,\n\"friable\"\n" if i == 17 else "Basalt"
+                grade = "bad" if i % 9 == 0 else "1.5"
+                writer.writerow([f"GEO-{i:03d}", rock_type, grade, "100", "10", "Site-A"])
+
+        serial = process_csv_with_validation(path)
+        assert serial["valid_rows"][15]["rock_type"].startswith("Granite\n")
+        for chunk_bytes in range(1, 200, 7):
+            chunks = split_record_chunks(path, chunk_bytes)
+            assert all(a[1] == b[0] for a, b in zip(chunks, chunks[1:]))
+            assert process_csv_with_validation(path, workers=2,
+                                               chunk_bytes=chunk_bytes) == serial
+
+    def test_parallel_streaming_matches_serial_outputs(self, depth_ordered_csv, tmp_dir):
+        """Parallel streaming mode should write the same files as a serial run."""
+        from lab4_error_handling import process_csv_with_validation
+
+        with open(depth_ordered_csv, "a", newline="") as f:
+            f.write("GEO-101,Granite,bad,100,10.0\n")
+            f.write("GEO-102,Granite,1.0,100,10.0,Site-A,extra\n")
+        results = {}
+        for workers in (1, 3):
+            out_dir = tmp_dir / f"out_{workers}"
+            out_dir.mkdir()
+            results[workers] = process_csv_with_validation(
+                depth_ordered_csv, workers=workers, chunk_bytes=500,
+                valid_output=str(out_dir / "valid.csv"),
+                quarantine_output=str(out_dir / "quarantine.csv"))
+            assert sorted(os.listdir(out_dir)) == ["quarantine.csv", "valid.csv"]
+        assert results[1] == results[3]
+        assert results[3]["valid_count"] == 101 and results[3]["error_count"] == 1
+        for name in ("valid.csv", "quarantine.csv"):
+            with open(tmp_dir / "out_1" / name, "rb") as f, \
+                    open(tmp_dir / "out_3" / name, "rb") as g:
+                assert f.read() == g.read()
+
     def test_get_file_info_existing_file(self, small_csv):
         """get_file_info should return info dict for existing file."""
         from lab4_error_handling import get_file_info
@@ -621,6 +1712,41 @@ class TestTask5ErrorHandling:
         assert result.get("exists") is False, "Should report file does not exist"
 
 
+    def test_get_file_info_counts_lines(self, small_csv, tmp_dir):
+        """get_file_info should count lines with or without a final newline."""
+        from lab4_error_handling import get_file_info
+
+        assert get_file_info(small_csv)["line_count"] == 5
+        path = str(tmp_dir / "no_newline.txt")
+        with open(path, "w") as f:
+            f.write("a\nb\nc")
+        assert get_file_info(path) == {"exists": True, "readable": True, "line_count": 3}
+
+    def test_get_directory_file_info_uses_stat_cache(self, small_csv, tmp_dir, monkeypatch):
+        """Unchanged files should be answered from the cache without opening them."""
+        import lab4_error_handling
+        from lab4_error_handling import get_directory_file_info
+
+        os.mkdir(tmp_dir / "subdir")
+        other = str(tmp_dir / "other.txt")
+        with open(other, "w") as f:
+            f.write("one\ntwo\n")
+        info = get_directory_file_info(str(tmp_dir), max_workers=2)
+        assert info == {
+            other: {"exists": True, "readable": True, "line_count": 2},
+            small_csv: {"exists": True, "readable": True, "line_count": 5},
+        }
+
+        opened = []
+        real_get_file_info = lab4_error_handling.get_file_info
+        monkeypatch.setattr(lab4_error_handling, "get_file_info",
+                            lambda path: opened.append(path) or real_get_file_info(path))
+        with open(other, "a") as f:
+            f.write("three\n")
+        info = get_directory_file_info(str(tmp_dir))
+        assert opened == [other]
+        assert info[other]["line_count"] == 3 and info[small_csv]["line_count"] == 5
+
 # ========================================================================
 # Data File Checks
 # ========================================================================